@@ -1,13 +1,22 @@
-from flask import Flask, session, render_template
+from datetime import datetime
+from flask import Flask, g, session, render_template
+from werkzeug.local import LocalProxy
 from flask_wtf.csrf import CSRFProtect
 from flask_talisman import Talisman
 from models import db
 from config import Config
+from services.perf import init_perf
+from services.template_cache import init_template_cache
+from services.assets import init_assets, vendored, VENDOR_ASSETS
+from services.replicas import init_replicas
+from services.sqlite_profile import configure_sqlite_pool, init_sqlite_profile
+from services.sessions import init_sessions
 
 # Import blueprints
 from routes.public import public_bp
 from routes.admin import admin_bp
 from routes.auth import auth_bp
+from routes.api import api_bp
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -19,21 +28,25 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # CSRF protection
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # Session timeout in seconds (1 hour)
 
 # Initialize extensions
+configure_sqlite_pool(app)
 db.init_app(app)
+init_sqlite_profile(app)
+init_replicas(app)
+init_sessions(app)
 csrf = CSRFProtect(app)
+init_perf(app)
+init_template_cache(app)
+init_assets(app)
 
 # Security headers configuration
+# Bootstrap comes from the CDN until `flask assets build` has vendored it
+bootstrap_cdn = ([] if all(vendored(app.static_folder, name) for name in VENDOR_ASSETS)
+                 else ['https://cdn.jsdelivr.net'])
 csp = {
     'default-src': "'self'",
     'img-src': ['*', 'data:'],  # Allow images from any source and data URLs
-    'script-src': [
-        "'self'",
-        'https://cdn.jsdelivr.net',  # For Bootstrap
-    ],
-    'style-src': [
-        "'self'",
-        'https://cdn.jsdelivr.net',  # For Bootstrap
-    ],
+    'script-src': ["'self'", *bootstrap_cdn],
+    'style-src': ["'self'", *bootstrap_cdn],
     'font-src': ["'self'", 'https:', 'data:'],
 }
 
@@ -53,18 +66,54 @@ Talisman(app,
 app.register_blueprint(public_bp)
 app.register_blueprint(admin_bp)
 app.register_blueprint(auth_bp)
+app.register_blueprint(api_bp)
+
+# CLI commands
+from services.search import search_cli
+from services.facets import facets_cli
+from services.query_plans import plans_cli
+from services.seed import seed_command
+from services.template_cache import templates_cli
+from services.assets import assets_cli
+from services.replicas import replicas_cli
+from services.hashing import hashing_cli
+from services.login_throttle import throttle_cli
+from services.sessions import sessions_cli
+from services.user_import import users_cli
+app.cli.add_command(search_cli)
+app.cli.add_command(facets_cli)
+app.cli.add_command(plans_cli)
+app.cli.add_command(seed_command)
+app.cli.add_command(templates_cli)
+app.cli.add_command(assets_cli)
+app.cli.add_command(replicas_cli)
+app.cli.add_command(hashing_cli)
+app.cli.add_command(throttle_cli)
+app.cli.add_command(sessions_cli)
+app.cli.add_command(users_cli)
 
 # Context processor for templates
 from models import User
+
+def load_current_user():
+    """The logged-in User, looked up at most once per request."""
+    if "current_user" not in g:
+        user_id = session.get("user_id")
+        g.current_user = db.session.get(User, user_id) if user_id else None
+    return g.current_user
+
 @app.context_processor
 def inject_user():
-    current_user = None
     current_admin = None
-    if session.get("user_id"):
-        current_user = User.query.get(session["user_id"])
     if session.get("admin"):
         current_admin = True
-    return dict(current_user=current_user, current_admin=current_admin)
+    # lazy: only templates that actually read current_user hit the database
+    return dict(current_user=LocalProxy(load_current_user), current_admin=current_admin)
+
+@app.context_processor
+def inject_now():
+    # base.html footer
+    return dict(now=datetime.utcnow())
 
 # Error handlers
 @app.errorhandler(404)
@@ -0,0 +1,15 @@
+"""
+ASGI entry point: the storefront's public pages served by async views, and
+every other route by the regular WSGI app on a thread pool.
+
+    uvicorn asgi:application --workers 1
+"""
+from functools import partial
+from app import app
+from routes.public_async import ASYNC_VIEWS
+from services.async_db import dispose_async_engines
+from utils.asgi import FlaskASGI
+
+application = FlaskASGI(app, ASYNC_VIEWS,
+                        threads=app.config["ASGI_THREADS"],
+                        on_shutdown=partial(dispose_async_engines, app))
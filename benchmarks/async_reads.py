@@ -0,0 +1,119 @@
+"""
+Storefront reads from one worker process: sync WSGI workers vs the async ASGI path.
+
+    python -m benchmarks.async_reads --size 100000 --concurrency 1 16 64 --duration 10
+
+Seeds (or reuses, with --data-dir) a catalog like benchmarks.load_test, then
+for each server below drives public.index and public.product at each
+--concurrency level, all against a single worker process:
+  gunicorn-sync     gunicorn app:app, one request at a time
+  gunicorn-threads  gunicorn app:app --threads N
+  uvicorn-async     uvicorn asgi:application (routes/public_async.py)
+--no-query-cache turns off the listing/facet query cache so that every
+listing request waits on the database. Against a local SQLite file every
+request is CPU-bound, which is the worst case for the async path;
+--db-latency-ms adds a delay to each SQL statement, on the thread running
+it, to stand in for a database across the network.
+"""
+import argparse
+import os
+import runpy
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.load_test import free_port, prepare, run_scenario, server_env, server_process
+
+SERVERS = ["gunicorn-sync", "gunicorn-threads", "uvicorn-async"]
+SCENARIOS = ["public.index", "public.product"]
+
+def serve(latency_ms, argv):
+    """Run the server module argv[0], every SQL statement delayed by latency_ms."""
+    delay = latency_ms / 1000
+
+    # execute() runs on the request's thread in a sync worker, and on
+    # aiosqlite's connection thread under asgi.py (the event loop keeps going)
+    class SlowCursor(sqlite3.Cursor):
+        def execute(self, *args):
+            time.sleep(delay)
+            return super().execute(*args)
+
+        def executemany(self, *args):
+            time.sleep(delay)
+            return super().executemany(*args)
+
+    class SlowConnection(sqlite3.Connection):
+        def cursor(self, factory=SlowCursor):
+            return super().cursor(factory)
+
+        def execute(self, *args):
+            time.sleep(delay)
+            return super().execute(*args)
+
+    if delay > 0:
+        connect = sqlite3.connect
+        sqlite3.connect = sqlite3.dbapi2.connect = (
+            lambda *args, **kwargs: connect(*args, factory=SlowConnection, **kwargs))
+    sys.argv = argv
+    runpy.run_module(argv[0], run_name="__main__", alter_sys=True)
+
+def server_args(name, port, threads, latency_ms):
+    if name == "uvicorn-async":
+        command = ["uvicorn", "--workers", "1", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning", "asgi:application"]
+    else:
+        command = ["gunicorn", "--workers", "1", "--bind", f"127.0.0.1:{port}",
+                   "--timeout", "120", "--log-level", "warning"]
+        if name == "gunicorn-threads":
+            command += ["--threads", str(threads)]
+        command += ["app:app"]
+    return ["-m", "benchmarks.async_reads", "--serve", str(latency_ms), *command]
+
+def main():
+    if sys.argv[1:2] == ["--serve"]:  # server process, see server_args()
+        serve(float(sys.argv[2]), sys.argv[3:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="catalog size")
+    parser.add_argument("--servers", nargs="+", default=SERVERS, choices=SERVERS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn-threads threads")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout")
+    parser.add_argument("--no-query-cache", action="store_true")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="simulated network latency per SQL statement")
+    parser.add_argument("--data-dir", help="keep the seeded database here and reuse it")
+    args = parser.parse_args()
+
+    tmp = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    try:
+        db_path = prepare(args.size, data_dir)
+        env = server_env(db_path, data_dir)
+        if args.no_query_cache:
+            env["QUERY_CACHE_SIZE"] = "0"
+        print(f"{'server':<17} {'scenario':<15} {'conc':>4} {'rps':>8} {'p50':>9} {'p95':>9} {'errors':>6}")
+        for name in args.servers:
+            port = free_port()
+            with server_process(server_args(name, port, args.threads, args.db_latency_ms), port, env):
+                for scenario in SCENARIOS:
+                    for concurrency in args.concurrency:
+                        r = run_scenario(scenario, port, args.size, concurrency,
+                                         args.duration, args.timeout)
+                        print(f"{name:<17} {scenario:<15} {concurrency:>4} {r['rps']:>8.1f} "
+                              f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['errors']:>6}",
+                              flush=True)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
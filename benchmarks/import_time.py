@@ -0,0 +1,64 @@
+"""
+Startup import-time budget for the app.
+
+    python -m benchmarks.import_time --budget-ms 1000
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter a few
+times, reports the median total and the heaviest modules, and exits 1 if
+the total is over budget or a lazily-loaded SDK got imported at startup.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# must only load when their backend / code path is first used
+LAZY_MODULES = ("stripe", "azure")
+
+def import_profile():
+    """{module: (self_us, cumulative_us)} for one cold `import app`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    # cumulative time of `app` covers everything it pulls in, but not the
+    # interpreter's own startup imports
+    total_ms = statistics.median(p["app"][1] / 1000 for p in profiles)
+
+    last = profiles[-1]
+    print(f"import app: median {total_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("heaviest modules (cumulative ms):")
+    heaviest = sorted(last.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (_, cum) in heaviest:
+        print(f"  {cum / 1000:8.1f}  {name.strip()}")
+
+    failed = False
+    eager = sorted({n.strip() for n in last if n.strip().split(".")[0] in LAZY_MODULES})
+    if eager:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: startup imports over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
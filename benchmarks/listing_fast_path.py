@@ -0,0 +1,73 @@
+"""
+Listing query: full ORM hydration vs. the lean Core fast path.
+
+    python -m benchmarks.listing_fast_path --products 20000 --page-size 24
+
+Seeds a temporary SQLite catalog with long descriptions, then times one
+listing page each way and measures peak Python memory (tracemalloc) per call.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from models import db, Product
+from services.catalog import filter_products, sort_keys, listing_rows
+from services.seed import seed_products
+from utils.pagination import keyset_paginate
+
+FILTERS = {"q": "", "min_price": None, "max_price": None, "category": "", "media_type": ""}
+
+def orm_page(engine, per_page):
+    # the listing as it was: full Product objects through a Session
+    with Session(engine) as session:
+        query, rank = filter_products(FILTERS, session.query(Product), "sqlite")
+        keys, descending = sort_keys(rank)
+        return keyset_paginate(query, keys, per_page, descending=descending).items
+
+def lean_page(engine, per_page):
+    with engine.connect() as conn:
+        return listing_rows(FILTERS, per_page, connection=conn).items
+
+def measure(fn, engine, per_page, rounds):
+    fn(engine, per_page)  # warm up
+    times, peaks = [], []
+    for _ in range(rounds):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(engine, per_page)
+        times.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(times) * 1000, statistics.median(peaks) / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, nargs="+", default=[24, 1000])
+    parser.add_argument("--description-words", type=int, default=400)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sa.create_engine("sqlite:///" + os.path.join(tmp, "bench.db"))
+        db.metadata.create_all(engine, tables=[Product.__table__])
+        with engine.begin() as conn:
+            seed_products(conn, args.products, description_words=args.description_words)
+            conn.exec_driver_sql("ANALYZE")
+
+        print(f"{args.products} products, ~{args.description_words}-word descriptions")
+        print(f"{'page':>6} {'path':>5} {'median ms':>10} {'peak KiB':>10}")
+        for per_page in args.page_size:
+            for name, fn in (("orm", orm_page), ("lean", lean_page)):
+                ms, kib = measure(fn, engine, per_page, args.rounds)
+                print(f"{per_page:>6} {name:>5} {ms:>10.2f} {kib:>10.1f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Load test every blueprint against a real multi-worker WSGI server.
+
+    python -m benchmarks.load_test --sizes 1000 100000 1000000 \
+        --workers 4 --concurrency 16 --duration 20 --output baseline.json
+    python -m benchmarks.load_test ... --output run.json --compare baseline.json
+
+For each catalog size a scratch SQLite database is seeded deterministically,
+gunicorn is started on localhost, and each scenario (public.index with a mix
+of filters, public.product, auth.login, admin.dashboard, admin.orders) is
+driven for --duration seconds by --concurrency client threads. Throughput and
+latency percentiles are written to --output as JSON; with --compare the run
+is checked against an earlier one and exits 1 on a regression beyond
+--tolerance.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlencode
+
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+
+from models import db, User
+from services.perf import percentile
+from services.seed import seed_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-admin-password"
+ORDER_COUNT = 1000
+
+INDEX_FILTER_MIX = [
+    {},
+    {"category": "portrait"},
+    {"media_type": "image/jpeg"},
+    {"min_price": 20, "max_price": 80},
+    {"q": "sunset"},
+    {"q": "golden city", "category": "travel"},
+    {"category": "wedding", "media_type": "video/mp4", "max_price": 150},
+]
+
+SCENARIOS = ["public.index", "public.product", "auth.login", "admin.dashboard", "admin.orders"]
+
+# ---------------------------------------------------------------- seeding
+
+def build_database(path, products):
+    engine = sa.create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "email": BENCH_EMAIL,
+            "password_hash": generate_password_hash(BENCH_PASSWORD),
+            "joined_at": datetime(2024, 1, 1),
+        }])
+    seed_database(engine, products=products, orders=ORDER_COUNT)
+    engine.dispose()
+
+def server_env(db_path, data_dir):
+    env = dict(os.environ)
+    env.update({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "CATALOG_VERSION_FILE": os.path.join(data_dir, "catalog.version"),
+        "SESSION_DB": os.path.join(data_dir, "sessions.db"),
+        "ADMIN_USERNAME": ADMIN_USERNAME,
+        "ADMIN_PASSWORD": ADMIN_PASSWORD,
+        "FLASK_SECRET_KEY": "load-test",
+        "LOGIN_THROTTLE": "0",  # every client logs in from 127.0.0.1
+    })
+    return env
+
+def prepare(size, data_dir):
+    """Seed (or reuse) the database for one catalog size."""
+    path = os.path.join(data_dir, f"catalog-{size}.db")
+    if not os.path.exists(path):
+        print(f"[{size}] seeding...", flush=True)
+        started = time.perf_counter()
+        build_database(path, size)
+        print(f"[{size}] seeded in {time.perf_counter() - started:.1f}s", flush=True)
+    return path
+
+# ---------------------------------------------------------------- server
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def server_process(args, port, env):
+    """Run `python <args>` from the repo root until it accepts connections on port."""
+    proc = subprocess.Popen([sys.executable, *args], cwd=ROOT, env=env)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"{args[1]} did not start")
+                time.sleep(0.2)
+        yield port
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+def wsgi_server(db_path, data_dir, workers):
+    port = free_port()
+    return server_process(
+        ["-m", "gunicorn", "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+         "--timeout", "120", "--log-level", "warning", "app:app"],
+        port, server_env(db_path, data_dir),
+    )
+
+# ---------------------------------------------------------------- client
+
+class Client:
+    """Keep-alive HTTP client with a one-cookie jar (the Flask session)."""
+
+    def __init__(self, port, timeout):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        self.origin = f"https://127.0.0.1:{port}"
+        self.cookie = None
+
+    def request(self, method, path, form=None):
+        # the app sits behind a TLS-terminating proxy in production
+        headers = {"X-Forwarded-Proto": "https"}
+        body = None
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        if form is not None:
+            body = urlencode(form)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            # CSRF protection checks the referrer on https form posts
+            headers["Referer"] = self.origin + path
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # the server closed an idle keep-alive connection; retry on a
+            # new one, as browsers do
+            self.conn.close()
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        data = response.read()
+        set_cookie = response.getheader("Set-Cookie")
+        if set_cookie:
+            self.cookie = set_cookie.split(";", 1)[0]
+        return response.status, data
+
+    def csrf_token(self, path):
+        _, page = self.request("GET", path)
+        match = re.search(rb'name="csrf-token" content="([^"]+)"', page)
+        return match.group(1).decode() if match else ""
+
+    def login_user(self, token=None):
+        token = token or self.csrf_token("/auth/login")
+        return self.request("POST", "/auth/login", {
+            "csrf_token": token, "email": BENCH_EMAIL, "password": BENCH_PASSWORD,
+        })
+
+    def login_admin(self):
+        token = self.csrf_token("/admin/login")
+        return self.request("POST", "/admin/login", {
+            "csrf_token": token, "username": ADMIN_USERNAME, "password": ADMIN_PASSWORD,
+        })
+
+def scenario_setup(name, client):
+    """Session state each scenario needs, established before timing starts."""
+    status = 302
+    if name in ("public.index", "public.product"):
+        status, _ = client.login_user()
+        for _ in range(30):
+            if status != 503:
+                break
+            time.sleep(1)  # hash queue full (services/hashing.py): retry like a user would
+            status, _ = client.login_user()
+    elif name == "auth.login":
+        client.login_token = client.csrf_token("/auth/login")
+    elif name.startswith("admin."):
+        status, _ = client.login_admin()
+    if status != 302:
+        raise RuntimeError(f"{name}: login failed with HTTP {status}")
+
+def scenario_request(name, client, rng, size):
+    if name == "public.index":
+        return client.request("GET", "/?" + urlencode(rng.choice(INDEX_FILTER_MIX)))
+    if name == "public.product":
+        return client.request("GET", f"/product/{rng.randint(1, size)}")
+    if name == "auth.login":
+        return client.login_user(client.login_token)
+    if name == "admin.dashboard":
+        return client.request("GET", "/admin/")
+    if name == "admin.orders":
+        return client.request("GET", "/admin/orders")
+    raise ValueError(name)
+
+def run_scenario(name, port, size, concurrency, duration, timeout):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    start_line = threading.Barrier(concurrency + 1, timeout=120)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = Client(port, timeout)
+        scenario_setup(name, client)
+        local, failed = [], 0
+        start_line.wait()
+        stop_at = time.monotonic() + duration
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                status, _ = scenario_request(name, client, rng, size)
+                ok = status < 400
+            except (OSError, http.client.HTTPException):
+                client = Client(port, timeout)
+                scenario_setup(name, client)
+                ok = False
+            if ok:
+                local.append((time.perf_counter() - started) * 1000)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    start_line.wait()
+    began = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+    }
+
+# ---------------------------------------------------------------- compare
+
+def compare(baseline, current, tolerance):
+    """Print per-scenario deltas; return the regressions."""
+    regressions = []
+    for size, scenarios in current["results"].items():
+        for name, now in scenarios.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before:
+                continue
+            rps_change = (now["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+            p95_change = ((now["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+                          if before["p95_ms"] else 0.0)
+            flag = ""
+            if rps_change < -tolerance or p95_change > tolerance:
+                flag = "  REGRESSION"
+                regressions.append((size, name))
+            print(f"  {size:>8} {name:<16} rps {rps_change:+7.1%}  p95 {p95_change:+7.1%}{flag}")
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout")
+    parser.add_argument("--data-dir", help="keep seeded databases here and reuse them")
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--compare", help="earlier --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed rps drop / p95 rise before flagging (fraction)")
+    args = parser.parse_args()
+
+    tmp = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "results": {},
+    }
+    try:
+        for size in args.sizes:
+            db_path = prepare(size, data_dir)
+            results = report["results"][str(size)] = {}
+            with wsgi_server(db_path, data_dir, args.workers) as port:
+                for name in args.scenarios:
+                    r = run_scenario(name, port, size, args.concurrency, args.duration, args.timeout)
+                    results[name] = r
+                    print(f"[{size}] {name:<16} {r['rps']:8.1f} rps  p50 {r['p50_ms']:7.1f}  "
+                          f"p95 {r['p95_ms']:7.1f}  p99 {r['p99_ms']:7.1f} ms  "
+                          f"errors {r['errors']}", flush=True)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"compared with {args.compare} (revision {baseline['meta'].get('revision')}):")
+        if compare(baseline, report, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
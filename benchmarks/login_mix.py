@@ -0,0 +1,94 @@
+"""
+Logins mixed with catalog reads in one worker: inline hashing vs the hash pool.
+
+    python -m benchmarks.login_mix --size 100000 --login-concurrency 4 16 \
+        --catalog-concurrency 16 --duration 10
+
+Seeds (or reuses, with --data-dir) a catalog like benchmarks.load_test and
+runs a single gunicorn worker with --threads N under each mode below. Every
+run drives --catalog scenario traffic on its own first, then together with
+auth.login traffic at each --login-concurrency level:
+  inline  HASH_POOL_SIZE=0, scrypt runs on the request thread holding the GIL
+  pool    HASH_POOL_SIZE=--pool-size, HASH_QUEUE_LIMIT=--queue-limit
+Rejected logins (503 from a full hash queue) show up as errors.
+"""
+import argparse
+import os
+import tempfile
+import threading
+
+from benchmarks.load_test import free_port, prepare, run_scenario, server_env, server_process
+
+MODES = ["inline", "pool"]
+
+def server_args(port, threads):
+    return ["-m", "gunicorn", "--workers", "1", "--threads", str(threads),
+            "--bind", f"127.0.0.1:{port}", "--timeout", "120", "--log-level", "warning",
+            "app:app"]
+
+def run_mixed(port, args, catalog_concurrency, login_concurrency):
+    """Catalog and login scenarios side by side; login_concurrency 0 runs the catalog alone."""
+    results = {}
+
+    def drive(name, concurrency):
+        results[name] = run_scenario(name, port, args.size, concurrency,
+                                     args.duration, args.timeout)
+
+    threads = [threading.Thread(target=drive, args=(args.catalog, catalog_concurrency))]
+    if login_concurrency:
+        threads.append(threading.Thread(target=drive, args=("auth.login", login_concurrency)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="catalog size")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--catalog", default="public.product",
+                        choices=["public.index", "public.product"])
+    parser.add_argument("--catalog-concurrency", type=int, default=16)
+    parser.add_argument("--login-concurrency", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads")
+    parser.add_argument("--pool-size", type=int, default=2, help="HASH_POOL_SIZE in pool mode")
+    parser.add_argument("--queue-limit", type=int, default=4, help="HASH_QUEUE_LIMIT in pool mode")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout")
+    parser.add_argument("--data-dir", help="keep the seeded database here and reuse it")
+    args = parser.parse_args()
+
+    tmp = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    try:
+        db_path = prepare(args.size, data_dir)
+        print(f"{'mode':<7} {'logins':>6} {'scenario':<15} {'conc':>4} {'rps':>8} "
+              f"{'p50':>9} {'p95':>9} {'errors':>6}")
+        for mode in args.modes:
+            env = server_env(db_path, data_dir)
+            env["HASH_POOL_SIZE"] = "0" if mode == "inline" else str(args.pool_size)
+            env["HASH_QUEUE_LIMIT"] = str(args.queue_limit)
+            port = free_port()
+            with server_process(server_args(port, args.threads), port, env):
+                for logins in [0, *args.login_concurrency]:
+                    results = run_mixed(port, args, args.catalog_concurrency, logins)
+                    for name, concurrency in ((args.catalog, args.catalog_concurrency),
+                                              ("auth.login", logins)):
+                        if name not in results:
+                            continue
+                        r = results[name]
+                        print(f"{mode:<7} {logins:>6} {name:<15} {concurrency:>4} {r['rps']:>8.1f} "
+                              f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['errors']:>6}",
+                              flush=True)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
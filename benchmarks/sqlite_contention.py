@@ -0,0 +1,136 @@
+"""
+Concurrent writers and readers on one SQLite file, default settings vs the production profile.
+
+    python -m benchmarks.sqlite_contention --writers 4 --readers 8 --duration 10
+
+For each mode a fresh database is seeded, then --writers threads run
+checkout-like transactions (read the prices, insert an order and its items,
+decrement stock) while --readers threads run storefront listing queries,
+for --duration seconds:
+  default   sa.create_engine() as-is: rollback journal, pysqlite's 5 s timeout
+  profile   services/sqlite_profile.py: WAL, busy_timeout and the other pragmas
+Reported per mode: committed writes and reads per second, "database is
+locked" failures, and p50/p95 latency of each.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import sqlalchemy as sa
+
+from config import Config
+from models import db, Order, OrderItem, Product
+from services.perf import percentile
+from services.seed import CATEGORIES, seed_database
+from services.sqlite_profile import apply_sqlite_profile
+
+MODES = ["default", "profile"]
+
+products = Product.__table__
+orders = Order.__table__
+order_items = OrderItem.__table__
+
+def make_engine(mode, url, threads):
+    # a connection per thread in both modes, so only the pragmas differ
+    engine = sa.create_engine(url, pool_size=threads, max_overflow=0)
+    if mode == "default":
+        return engine
+    apply_sqlite_profile(engine,
+                         busy_timeout_ms=Config.SQLITE_BUSY_TIMEOUT_MS,
+                         synchronous=Config.SQLITE_SYNCHRONOUS,
+                         mmap_size=Config.SQLITE_MMAP_SIZE,
+                         cache_size_kb=Config.SQLITE_CACHE_SIZE_KB)
+    return engine
+
+def checkout(conn, rng, product_count):
+    ids = rng.sample(range(1, product_count + 1), rng.randint(1, 4))
+    prices = dict(conn.execute(
+        sa.select(products.c.id, products.c.price_cents).where(products.c.id.in_(ids))).all())
+    order_id = conn.execute(orders.insert().values(
+        email=f"bench{rng.randrange(1000)}@example.com",
+        amount_cents=sum(prices.values()), status="paid")).inserted_primary_key[0]
+    conn.execute(order_items.insert(), [
+        {"order_id": order_id, "product_id": pid, "quantity": 1, "unit_price_cents": price}
+        for pid, price in prices.items()])
+    conn.execute(products.update().where(products.c.id.in_(ids), products.c.stock > 0)
+                 .values(stock=products.c.stock - 1))
+
+def listing(conn, rng):
+    query = (sa.select(products.c.id, products.c.title, products.c.price_cents)
+             .order_by(products.c.created_at.desc(), products.c.id.desc()).limit(24))
+    if rng.random() < 0.5:
+        query = query.where(products.c.category == rng.choice(list(CATEGORIES)))
+    conn.execute(query).all()
+    conn.execute(sa.select(sa.func.count()).select_from(orders)).scalar()
+
+def run_mode(mode, path, args):
+    url = f"sqlite:///{path}"
+    setup = sa.create_engine(url)
+    db.metadata.create_all(setup)
+    seed_database(setup, products=args.products, users=100, orders=1000)
+    setup.dispose()
+
+    engine = make_engine(mode, url, args.writers + args.readers)
+    stop = threading.Event()
+    results = {"write": [], "read": []}
+    locked = {"write": 0, "read": 0}
+    lock = threading.Lock()
+
+    def loop(kind, seed):
+        rng = random.Random(seed)
+        timings, failures = [], 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    if kind == "write":
+                        checkout(conn, rng, args.products)
+                    else:
+                        listing(conn, rng)
+            except sa.exc.OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                failures += 1
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+        with lock:
+            results[kind].extend(timings)
+            locked[kind] += failures
+
+    threads = [threading.Thread(target=loop, args=("write", i)) for i in range(args.writers)]
+    threads += [threading.Thread(target=loop, args=("read", 1000 + i)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return results, locked
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per mode.")
+    parser.add_argument("--products", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.duration:g}s per mode")
+    print(f"{'mode':<8} {'writes/s':>9} {'locked':>7} {'p50':>8} {'p95':>8}   "
+          f"{'reads/s':>9} {'locked':>7} {'p50':>8} {'p95':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            results, locked = run_mode(mode, os.path.join(tmp, f"{mode}.db"), args)
+            cells = []
+            for kind in ("write", "read"):
+                timings = sorted(results[kind])
+                cells.append(f"{len(timings) / args.duration:>9.1f} {locked[kind]:>7} "
+                             f"{percentile(timings, 50):>6.1f}ms {percentile(timings, 95):>6.1f}ms")
+            print(f"{mode:<8} " + "   ".join(cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+First-render vs steady-state template cost, with and without the bytecode cache.
+
+    python -m benchmarks.template_render --runs 5
+
+Each mode starts fresh worker processes against a small seeded database:
+  no-cache     TEMPLATE_BYTECODE_CACHE=0, every worker compiles from source
+  cold-cache   empty cache directory (the first worker after a deploy)
+  precompiled  after `flask templates precompile`
+and reports, as medians over --runs workers: the time to load every
+template, and per page the first request against the steady-state median.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import sqlalchemy as sa
+
+from models import db
+from services.seed import seed_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = [
+    ("/", "index.html"),
+    ("/product/1", "product.html"),
+    ("/auth/login", "login.html"),
+    ("/admin/", "admin_dashboard.html"),
+]
+
+MODES = ["no-cache", "cold-cache", "precompiled"]
+
+# ---------------------------------------------------------------- worker
+
+def load_all_templates():
+    from app import app
+    env = app.jinja_env
+    start = time.perf_counter()
+    for name in env.list_templates():
+        env.get_template(name)
+    return (time.perf_counter() - start) * 1000
+
+def render_pages(steady_rounds):
+    from app import app
+    app.config["WTF_CSRF_ENABLED"] = False
+    client = app.test_client()
+    with client.session_transaction(base_url="https://localhost") as session:
+        session["user_id"] = 1
+        session["admin"] = True
+
+    def timed_get(path):
+        start = time.perf_counter()
+        response = client.get(path, base_url="https://localhost")
+        assert response.status_code == 200, (path, response.status_code)
+        return (time.perf_counter() - start) * 1000
+
+    results = {}
+    for path, _ in PAGES:
+        first = timed_get(path)
+        steady = statistics.median(timed_get(path) for _ in range(steady_rounds))
+        results[path] = (first, steady)
+    return results
+
+def worker(task, steady_rounds):
+    if task == "load":
+        print(json.dumps(load_all_templates()))
+    else:
+        print(json.dumps(render_pages(steady_rounds)))
+
+# ---------------------------------------------------------------- driver
+
+def run_worker(env, task, steady_rounds):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.template_render", "--worker", task,
+         "--steady-rounds", str(steady_rounds)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def prepare_mode(mode, env):
+    cache = env["TEMPLATE_CACHE_DIR"]
+    for name in os.listdir(cache):
+        os.remove(os.path.join(cache, name))
+    if mode == "precompiled":
+        subprocess.run([sys.executable, "-m", "flask", "--app", "app", "templates", "precompile"],
+                       cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh workers per mode.")
+    parser.add_argument("--steady-rounds", type=int, default=50)
+    parser.add_argument("--worker", choices=["load", "pages"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.steady_rounds)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = sa.create_engine(f"sqlite:///{db_path}")
+        db.metadata.create_all(engine)
+        seed_database(engine, products=2000, users=10, orders=200)
+        engine.dispose()
+
+        cache = os.path.join(tmp, "jinja-cache")
+        os.makedirs(cache)
+        base_env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_path}",
+                        CATALOG_VERSION_FILE=os.path.join(tmp, "catalog.version"),
+                        TEMPLATE_CACHE_DIR=cache, SERVER_TIMING="0")
+
+        print(f"{'mode':<12} {'load all':>9} " +
+              " ".join(f"{path + ' first/steady':>26}" for path, _ in PAGES))
+        for mode in MODES:
+            env = dict(base_env, TEMPLATE_BYTECODE_CACHE="0" if mode == "no-cache" else "1")
+            loads, pages = [], []
+            for _ in range(args.runs):
+                # cold-cache: every worker starts from an empty directory
+                prepare_mode(mode, env)
+                loads.append(run_worker(env, "load", args.steady_rounds))
+                prepare_mode(mode, env)
+                pages.append(run_worker(env, "pages", args.steady_rounds))
+
+            cells = []
+            for path, _ in PAGES:
+                first = statistics.median(p[path][0] for p in pages)
+                steady = statistics.median(p[path][1] for p in pages)
+                cells.append(f"{first:>14.1f} / {steady:>6.1f} ms")
+            print(f"{mode:<12} {statistics.median(loads):>6.1f} ms " + " ".join(f"{c:>26}" for c in cells))
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,60 @@ class Config:
         "SQLALCHEMY_DATABASE_URI", "sqlite:///filmcompany.db"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # read replicas, comma-separated; GET requests read from them (services/replicas.py)
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv("SQLALCHEMY_REPLICA_URIS", "").split(",")
+                               if uri.strip()]
+    SQLALCHEMY_BINDS = {f"replica-{i}": uri for i, uri in enumerate(SQLALCHEMY_REPLICA_URIS)}
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))  # primary reads after a client's write
+    # SQLite production profile (services/sqlite_profile.py)
+    SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "1") == "1"  # WAL and connection pragmas for file databases
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # page cache per connection
+    SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))  # connections per worker
+    ASGI_THREADS = int(os.getenv("ASGI_THREADS", "8"))  # asgi.py: threads for the WSGI routes and the async views' blocking steps
+    ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", "32"))  # asgi.py: async engine connections per worker
+
+    # Storefront
+    PRODUCTS_PER_PAGE = int(os.getenv("PRODUCTS_PER_PAGE", "24"))
+    CARD_CACHE_SIZE = int(os.getenv("CARD_CACHE_SIZE", "5000"))  # rendered listing cards per worker
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))  # cached listing/facet queries per worker
+    QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "300"))  # seconds
+    CATALOG_VERSION_FILE = os.getenv("CATALOG_VERSION_FILE", "")  # default: <instance>/catalog.version
+
+    # Performance instrumentation
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"  # emit Server-Timing headers
+    PERF_WINDOW = int(os.getenv("PERF_WINDOW", "1000"))  # requests kept per endpoint for percentiles
+    TEMPLATE_BYTECODE_CACHE = os.getenv("TEMPLATE_BYTECODE_CACHE", "1") == "1"  # persist compiled templates
+    STATIC_FINGERPRINTS = os.getenv("STATIC_FINGERPRINTS", "1") == "1"  # serve static/dist/ once `flask assets build` has run
+    TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "")  # default: <instance>/jinja-cache
+
+    # Password hashing
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")  # werkzeug method; see `flask hashing calibrate`
+    HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", "2"))  # hashing processes per worker; 0 hashes inline
+    HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "4"))  # queued + running hashes per worker before 503
+    HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "5"))  # seconds to wait for a hash before 503
+    HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "2"))  # Retry-After seconds on those 503s
+
+    # Sessions
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")  # "sqlite" (all workers), "memory" (dev) or "cookie"
+    SESSION_DB = os.getenv("SESSION_DB", "")  # default: <instance>/sessions.db
+    SESSION_MEMORY_SIZE = int(os.getenv("SESSION_MEMORY_SIZE", "10000"))  # sessions kept by the memory backend
+    SESSION_CLEANUP_EVERY = int(os.getenv("SESSION_CLEANUP_EVERY", "1000"))  # saves between expired-session sweeps
+    SESSION_CLEANUP_BATCH = int(os.getenv("SESSION_CLEANUP_BATCH", "500"))  # rows per delete; a sweep repeats until none are left
+
+    # Login throttling, checked before any lookup or hashing
+    LOGIN_THROTTLE = os.getenv("LOGIN_THROTTLE", "1") == "1"
+    LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "sqlite")  # "sqlite" (all workers) or "memory"
+    LOGIN_THROTTLE_DB = os.getenv("LOGIN_THROTTLE_DB", "")  # default: <instance>/login-throttle.db
+    LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "30"))  # attempts per client IP before throttling
+    LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))  # refill rate
+    LOGIN_ACCOUNT_BURST = int(os.getenv("LOGIN_ACCOUNT_BURST", "5"))  # attempts per account
+    LOGIN_ACCOUNT_PER_MINUTE = float(os.getenv("LOGIN_ACCOUNT_PER_MINUTE", "1"))
+    LOGIN_LOCKOUT_SECONDS = int(os.getenv("LOGIN_LOCKOUT_SECONDS", "60"))  # first lockout, doubling after
+    LOGIN_LOCKOUT_MAX = int(os.getenv("LOGIN_LOCKOUT_MAX", "3600"))
+    LOGIN_PROXY_HOPS = int(os.getenv("LOGIN_PROXY_HOPS", "0"))  # trusted proxies adding X-Forwarded-For
 
     # Admin credentials
     ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
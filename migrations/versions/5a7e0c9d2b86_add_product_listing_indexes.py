@@ -0,0 +1,29 @@
+"""add product listing indexes
+
+Revision ID: 5a7e0c9d2b86
+Revises: c4d82a0f5e13
+Create Date: 2026-10-18 11:58:32.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a7e0c9d2b86'
+down_revision = 'c4d82a0f5e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_product_created_at_id', 'product', ['created_at', 'id'])
+    op.create_index('ix_product_category_created_at_id', 'product', ['category', 'created_at', 'id'])
+    op.create_index('ix_product_mime_type_created_at', 'product', ['mime_type', 'created_at'])
+    op.create_index('ix_product_price_cents', 'product', ['price_cents'])
+
+def downgrade():
+    op.drop_index('ix_product_price_cents', table_name='product')
+    op.drop_index('ix_product_mime_type_created_at', table_name='product')
+    op.drop_index('ix_product_category_created_at_id', table_name='product')
+    op.drop_index('ix_product_created_at_id', table_name='product')
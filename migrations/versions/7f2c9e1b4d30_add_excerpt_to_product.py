@@ -0,0 +1,31 @@
+"""add excerpt to product
+
+Revision ID: 7f2c9e1b4d30
+Revises: e31b6d48a0c7
+Create Date: 2026-10-18 14:46:51.208733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f2c9e1b4d30'
+down_revision = 'e31b6d48a0c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product', sa.Column('excerpt', sa.String(length=128), nullable=True))
+    # same rule as models.make_excerpt
+    op.execute("""
+        UPDATE product SET excerpt = CASE
+            WHEN length(description) > 120 THEN substr(description, 1, 120) || '…'
+            ELSE description
+        END
+    """)
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_column('excerpt')
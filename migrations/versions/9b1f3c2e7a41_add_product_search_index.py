@@ -0,0 +1,75 @@
+"""add product full-text search index
+
+Revision ID: 9b1f3c2e7a41
+Revises: 663d3fa3e209
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1f3c2e7a41'
+down_revision = '663d3fa3e209'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE product_fts USING fts5(
+                title, description,
+                content='product', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute("INSERT INTO product_fts(product_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+        op.execute("""
+            CREATE TRIGGER product_fts_ai AFTER INSERT ON product BEGIN
+                INSERT INTO product_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER product_fts_ad AFTER DELETE ON product BEGIN
+                INSERT INTO product_fts(product_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER product_fts_au AFTER UPDATE OF title, description ON product BEGIN
+                INSERT INTO product_fts(product_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO product_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+        # index the existing catalog
+        op.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+
+    elif dialect == 'postgresql':
+        op.execute("""
+            ALTER TABLE product ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'B')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_product_search_vector ON product USING gin (search_vector)")
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS product_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS product_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS product_fts_ai")
+        op.execute("DROP TABLE IF EXISTS product_fts")
+
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_product_search_vector")
+        op.drop_column('product', 'search_vector')
@@ -0,0 +1,30 @@
+"""listing indexes keep listing order
+
+Revision ID: b7e4a19c3f52
+Revises: 7f2c9e1b4d30
+Create Date: 2026-10-18 19:02:17.540318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4a19c3f52'
+down_revision = '7f2c9e1b4d30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the media filter is an equality now; with id the index serves the
+    # whole listing order. A price range can't also give that order, and the
+    # price index only ever led to sorting every product in the range.
+    op.drop_index('ix_product_mime_type_created_at', table_name='product')
+    op.create_index('ix_product_mime_type_created_at_id', 'product', ['mime_type', 'created_at', 'id'])
+    op.drop_index('ix_product_price_cents', table_name='product')
+
+def downgrade():
+    op.create_index('ix_product_price_cents', 'product', ['price_cents'])
+    op.drop_index('ix_product_mime_type_created_at_id', table_name='product')
+    op.create_index('ix_product_mime_type_created_at', 'product', ['mime_type', 'created_at'])
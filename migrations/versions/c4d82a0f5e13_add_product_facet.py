@@ -0,0 +1,39 @@
+"""add product_facet summary table
+
+Revision ID: c4d82a0f5e13
+Revises: 9b1f3c2e7a41
+Create Date: 2026-10-18 10:41:07.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d82a0f5e13'
+down_revision = '9b1f3c2e7a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_facet',
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('value', sa.String(length=128), nullable=False),
+        sa.Column('product_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('in_stock_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('kind', 'value')
+    )
+    # seed from the existing catalog
+    for kind, column in (('category', 'category'), ('media_type', 'mime_type')):
+        op.execute(f"""
+            INSERT INTO product_facet (kind, value, product_count, in_stock_count)
+            SELECT '{kind}', {column}, COUNT(*), SUM(CASE WHEN stock > 0 THEN 1 ELSE 0 END)
+            FROM product
+            WHERE {column} IS NOT NULL AND {column} != ''
+            GROUP BY {column}
+        """)
+
+def downgrade():
+    op.drop_table('product_facet')
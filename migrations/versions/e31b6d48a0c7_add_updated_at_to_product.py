@@ -0,0 +1,25 @@
+"""add updated_at to product
+
+Revision ID: e31b6d48a0c7
+Revises: 5a7e0c9d2b86
+Create Date: 2026-10-18 13:20:15.472381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e31b6d48a0c7'
+down_revision = '5a7e0c9d2b86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE product SET updated_at = created_at")
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -1,21 +1,54 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
+from services.hashing import hash_password, needs_rehash, verify_password
+from services.replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+EXCERPT_LENGTH = 120
+
+def make_excerpt(text):
+    """Listing-card excerpt of a product description."""
+    if not text:
+        return text
+    return text[:EXCERPT_LENGTH] + ("…" if len(text) > EXCERPT_LENGTH else "")
 
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
+    excerpt = db.Column(db.String(128))  # make_excerpt(description), for listing cards
     price_cents = db.Column(db.Integer, nullable=False)  # store in smallest currency unit
     media_key = db.Column(db.String(512), nullable=False)  # filename or blob name
     mime_type = db.Column(db.String(128))
     thumbnail_key = db.Column(db.String(512))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     stock = db.Column(db.Integer, nullable=False)
     category = db.Column(db.String(128), nullable=True)
 
+    # storefront listing: newest-first browsing, plus each filter it offers
+    # (see `flask query-plans check`)
+    __table_args__ = (
+        db.Index("ix_product_created_at_id", "created_at", "id"),
+        db.Index("ix_product_category_created_at_id", "category", "created_at", "id"),
+        db.Index("ix_product_mime_type_created_at_id", "mime_type", "created_at", "id"),
+    )
+
+    @validates("description")
+    def _sync_excerpt(self, key, value):
+        self.excerpt = make_excerpt(value)
+        return value
+
+class ProductFacet(db.Model):
+    # value -> product count for the storefront filter dropdowns,
+    # maintained incrementally by services/facets.py
+    kind = db.Column(db.String(32), primary_key=True)  # "category" or "media_type"
+    value = db.Column(db.String(128), primary_key=True)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    in_stock_count = db.Column(db.Integer, nullable=False, default=0)
+
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), nullable=False)
@@ -44,7 +77,12 @@ class User(db.Model):
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)  # optional
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verify password, re-hashing it if it was stored with older parameters."""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)  # saved with the caller's commit
+        return True
@@ -1,6 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, abort
 from models import Product, Order, db
 from utils.media import save_media
+from services.catalog import catalog_changed
+from services.hashing import hash_pool
+from services.login_throttle import login_throttle
+from services.perf import endpoint_stats
+from services.sessions import rotate_session
 from config import Config
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -16,8 +21,11 @@ def login():
 
     username = request.form.get("username")
     password = request.form.get("password")
+    login_throttle.check(f"admin:{username}")
 
     if username == Config.ADMIN_USERNAME and password == Config.ADMIN_PASSWORD:
+        login_throttle.succeeded(f"admin:{username}")
+        rotate_session()
         session["admin"] = True
         return redirect(url_for("admin.dashboard"))
 
@@ -63,6 +71,7 @@ def dashboard():
         )
         db.session.add(product)
         db.session.commit()
+        catalog_changed(product.id)
         flash("Product added successfully.", "success")
         return redirect(url_for("admin.dashboard"))
 
@@ -78,6 +87,7 @@ def update_stock(product_id):
     try:
         product.stock = int(new_stock)
         db.session.commit()
+        catalog_changed(product_id)
         flash("Stock updated successfully.", "success")
     except (ValueError, TypeError):
         flash("Invalid stock value.", "danger")
@@ -90,6 +100,7 @@ def delete(product_id):
     product = Product.query.get_or_404(product_id)
     db.session.delete(product)
     db.session.commit()
+    catalog_changed(product_id)
     flash("Product deleted successfully.", "success")
     return redirect(url_for("admin.dashboard"))
 
@@ -126,6 +137,7 @@ def edit_product(product_id):
             product.thumbnail_key = thumbnail_key
 
         db.session.commit()
+        catalog_changed(product_id)
         flash("Product updated.", "success")
         return redirect(url_for("admin.dashboard"))
 
@@ -138,6 +150,13 @@ def orders():
     orders = Order.query.order_by(Order.created_at.desc()).all()
     return render_template("admin_orders.html", orders=orders)
 
+@admin_bp.route("/perf")
+def perf():
+    require_admin()
+    return render_template("admin_perf.html", stats=endpoint_stats.summary(),
+                           window=endpoint_stats.window, hashing=hash_pool.stats(),
+                           throttle=login_throttle.stats())
+
 @admin_bp.route("/orders/<int:order_id>", methods=["GET", "POST"])
 def order_detail(order_id):
     require_admin()
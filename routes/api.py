@@ -0,0 +1,69 @@
+import json
+import sqlalchemy as sa
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+from models import Product, db
+from services.catalog import product_filters, filter_products
+from services.suggest import suggest_index
+
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+# exported fields; media_key is deliberately absent (it is the paid download)
+EXPORT_COLUMNS = (
+    Product.id, Product.title, Product.description, Product.price_cents,
+    Product.mime_type, Product.category, Product.stock, Product.thumbnail_key,
+    Product.created_at, Product.updated_at,
+)
+EXPORT_BATCH_SIZE = 1000
+
+SUGGEST_MAX_LIMIT = 20
+SUGGEST_MAX_QUERY = 100  # characters; longer prefixes match no more titles
+
+def _export_record(row):
+    record = row._asdict()
+    for key in ("created_at", "updated_at"):
+        if record[key] is not None:
+            record[key] = record[key].isoformat()
+    record["url"] = url_for("public.product", product_id=record["id"], _external=True)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+@api_bp.route("/catalog")
+def catalog():
+    """
+    Stream the catalog, filtered like public.index, as NDJSON (default) or
+    as a single JSON array with ?format=json. Rows are read in batches from
+    a server-side cursor, so memory stays flat however large the catalog.
+    """
+    filters = product_filters(request.args)
+    as_array = request.args.get("format") == "json"
+
+    def generate():
+        with db.engine.connect() as conn:
+            stmt, _rank = filter_products(filters, sa.select(*EXPORT_COLUMNS), conn.dialect.name)
+            result = conn.execution_options(
+                stream_results=True, yield_per=EXPORT_BATCH_SIZE
+            ).execute(stmt.order_by(Product.id))
+
+            if as_array:
+                yield "["
+            first = True
+            for batch in result.partitions():
+                lines = [_export_record(row) for row in batch]
+                if as_array:
+                    yield ("" if first else ",") + ",".join(lines)
+                else:
+                    yield "\n".join(lines) + "\n"
+                first = False
+            if as_array:
+                yield "]"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/json" if as_array else "application/x-ndjson",
+    )
+
+@api_bp.route("/suggest")
+def suggest():
+    """Product titles matching the typed prefix, for the search box."""
+    q = request.args.get("q", "")[:SUGGEST_MAX_QUERY]
+    limit = max(1, min(request.args.get("limit", 8, type=int), SUGGEST_MAX_LIMIT))
+    return jsonify(suggest_index.search(q, limit=limit))
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
 from models import User, db
+from services.login_throttle import login_throttle
+from services.sessions import rotate_session
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -20,8 +21,8 @@ def register():
         flash("Email is already registered.", "danger")
         return redirect(url_for("auth.register"))
 
-    hashed_pw = generate_password_hash(password)
-    user = User(email=email, password_hash=hashed_pw)
+    user = User(email=email)
+    user.set_password(password)
     db.session.add(user)
     db.session.commit()
 
@@ -35,13 +36,17 @@ def login():
 
     email = request.form.get("email", "").strip().lower()
     password = request.form.get("password", "")
+    login_throttle.check(f"user:{email}")
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not user.check_password(password):
         flash("Invalid email or password.", "danger")
         return redirect(url_for("auth.login"))
+    db.session.commit()  # an upgraded password_hash, if check_password re-hashed it
+    login_throttle.succeeded(f"user:{email}")
 
+    rotate_session()
     session["user_id"] = user.id
     flash("Logged in successfully.", "success")
     return redirect(url_for("public.index"))
@@ -1,5 +1,9 @@
-from flask import Blueprint, render_template, request, session
-from models import Product, db
+from flask import Blueprint, current_app, make_response, render_template, request, session
+from models import Product
+from services.catalog import product_filters, cached_listing_page
+from services.facets import facet_counts
+from services.fragment_cache import render_product_cards
+from utils.http import make_etag, not_modified, add_validators
 
 public_bp = Blueprint('public', __name__)
 
@@ -9,45 +13,54 @@ def index():
     if not session.get("user_id") and not session.get("admin"):
         return render_template("home.html")
 
-    q          = request.args.get("q", "").strip()
-    min_price  = request.args.get("min_price", type=int)
-    max_price  = request.args.get("max_price", type=int)
-    category   = request.args.get("category", "").strip()
-    media_type = request.args.get("media_type", "").strip()
+    filters = product_filters(request.args)
+    page = cached_listing_page(
+        filters,
+        per_page=current_app.config["PRODUCTS_PER_PAGE"],
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
 
-    products_q = Product.query
+    categories  = facet_counts("category")
+    media_types = facet_counts("media_type")
+    return render_listing(filters, page, categories, media_types)
 
-    if q:
-        products_q = products_q.filter(Product.title.ilike(f"%{q}%"))
-    if min_price is not None:
-        products_q = products_q.filter(Product.price_cents >= min_price * 100)
-    if max_price is not None:
-        products_q = products_q.filter(Product.price_cents <= max_price * 100)
-    if category:
-        products_q = products_q.filter_by(category=category)
-    if media_type:
-        products_q = products_q.filter(Product.mime_type.ilike(f"{media_type}%"))
+@public_bp.route("/product/<int:product_id>")
+def product(product_id):
+    p = Product.query.get_or_404(product_id)
+    return render_product(p)
 
-    products = products_q.order_by(Product.created_at.desc()).all()
+# Rendering, shared with the async views in routes/public_async.py
 
-    categories  = [c[0] for c in db.session.query(Product.category).distinct() if c[0]]
-    media_types = [m[0] for m in db.session.query(Product.mime_type).distinct() if m[0]]
+def render_listing(filters, page, categories, media_types):
+    etag = make_etag(
+        sorted(request.args.items(multi=True)),
+        [(p.id, p.updated_at) for p in page.items],
+        page.prev_cursor, page.next_cursor,
+        categories, media_types,
+    )
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
 
-    return render_template(
+    response = make_response(render_template(
         "index.html",
-        products=products,
+        cards=render_product_cards(page.items),
+        page=page,
         categories=categories,
         media_types=media_types,
-        filters={
-            "q": q,
-            "min_price": min_price,
-            "max_price": max_price,
-            "category": category,
-            "media_type": media_type,
-        }
-    )
+        filters=filters,
+        # active filters, carried over to the prev/next links
+        page_args={k: v for k, v in filters.items() if v not in (None, "")},
+    ))
+    return add_validators(response, etag)
 
-@public_bp.route("/product/<int:product_id>")
-def product(product_id):
-    p = Product.query.get_or_404(product_id)
-    return render_template("product.html", product=p)
+def render_product(p):
+    last_modified = p.updated_at or p.created_at
+    etag = make_etag(p.id, last_modified)
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    response = make_response(render_template("product.html", product=p))
+    return add_validators(response, etag, last_modified)
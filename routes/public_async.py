@@ -0,0 +1,42 @@
+import asyncio
+from flask import abort, current_app, render_template, request, session
+from models import Product
+from routes.public import render_listing, render_product
+from services.async_db import get
+from services.catalog import product_filters, cached_listing_page_async
+from services.facets import facet_counts_async
+
+# Async variants of the public blueprint's views, served by asgi.py under an
+# ASGI server: database reads are awaited instead of holding a thread, and
+# rendering is handed to a thread so it doesn't stall the event loop. Same
+# URLs, endpoints, caches and rendering as routes/public.py.
+
+async def index():
+    #if nobody is logged in, show homepage
+    if not session.get("user_id") and not session.get("admin"):
+        return await asyncio.to_thread(render_template, "home.html")
+
+    filters = product_filters(request.args)
+    page, categories, media_types = await asyncio.gather(
+        cached_listing_page_async(
+            filters,
+            per_page=current_app.config["PRODUCTS_PER_PAGE"],
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+        ),
+        facet_counts_async("category"),
+        facet_counts_async("media_type"),
+    )
+    return await asyncio.to_thread(render_listing, filters, page, categories, media_types)
+
+async def product(product_id):
+    p = await get(Product, product_id)
+    if p is None:
+        abort(404)
+    return await asyncio.to_thread(render_product, p)
+
+# endpoint -> async view
+ASYNC_VIEWS = {
+    "public.index": index,
+    "public.product": product,
+}
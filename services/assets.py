@@ -0,0 +1,163 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+import urllib.request
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+# Static asset pipeline. `flask assets build` vendors third-party files into
+# static/vendor/, copies every static file to static/dist/ under a
+# content-hashed name (css/style.css -> dist/css/style.<hash>.css) with a
+# .gz sibling for text assets, and writes dist/manifest.json. While a
+# manifest is present, url_for('static', ...) resolves to the hashed files,
+# which are served with a one-year immutable Cache-Control (and gzip to
+# clients that accept it). Without a build, static files are served as-is.
+
+# vendored name -> upstream URL
+VENDOR_ASSETS = {
+    "vendor/bootstrap/bootstrap.min.css":
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js":
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js",
+}
+
+DIST_DIR = "dist"
+MANIFEST = "dist/manifest.json"
+SKIP_DIRS = ("uploads", DIST_DIR)  # user media is not a build asset
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".txt", ".map", ".ico")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+def vendored(static_folder, name):
+    return os.path.isfile(os.path.join(static_folder, name))
+
+def fetch_vendor_assets(static_folder, refresh=False):
+    """Download missing (or, with refresh, all) VENDOR_ASSETS. Returns the names fetched."""
+    fetched = []
+    for name, url in VENDOR_ASSETS.items():
+        if vendored(static_folder, name) and not refresh:
+            continue
+        path = os.path.join(static_folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        fetched.append(name)
+    return fetched
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root == ".":
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for filename in files:
+            if filename.startswith(".") or filename.endswith(".tmp"):
+                continue
+            yield os.path.normpath(os.path.join(rel_root, filename)).replace(os.sep, "/")
+
+def fingerprinted_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{DIST_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+def build_assets(static_folder):
+    """
+    Write hashed copies into static/dist/ and replace the manifest. Files
+    from earlier builds are left in place for workers still serving pages
+    that link to them; `flask assets clean` removes them.
+    """
+    manifest = {}
+    for name in sorted(_source_files(static_folder)):
+        with open(os.path.join(static_folder, name), "rb") as f:
+            data = f.read()
+        target = fingerprinted_name(name, data)
+        path = os.path.join(static_folder, target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        if name.endswith(COMPRESSIBLE):
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                with open(path + ".gz", "wb") as f:
+                    f.write(compressed)
+        manifest[name] = target
+    path = os.path.join(static_folder, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def init_assets(app):
+    manifest = load_manifest(app.static_folder) if app.config["STATIC_FINGERPRINTS"] else {}
+    hashed = set(manifest.values())
+    gzipped = {name for name in hashed if os.path.isfile(os.path.join(app.static_folder, name + ".gz"))}
+    upstream = {name: url for name, url in VENDOR_ASSETS.items()
+                if not vendored(app.static_folder, name)}
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = manifest.get(values["filename"], values["filename"])
+
+    def static(filename):
+        if filename not in hashed:
+            return app.send_static_file(filename)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        gzip_ok = filename in gzipped and "gzip" in request.accept_encodings
+        response = send_from_directory(app.static_folder,
+                                       filename + ".gz" if gzip_ok else filename,
+                                       mimetype=mimetype)
+        if gzip_ok:
+            response.headers["Content-Encoding"] = "gzip"
+        if filename in gzipped:
+            response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+    app.view_functions["static"] = static
+
+    @app.template_global()
+    def asset_url(name):
+        """url_for('static') for a vendored file, or its upstream URL until it is vendored."""
+        return upstream.get(name) or url_for("static", filename=name)
+
+assets_cli = AppGroup("assets", help="Static asset pipeline commands.")
+
+@assets_cli.command("build")
+@click.option("--refresh-vendor", is_flag=True, help="Re-download vendored files.")
+@click.option("--offline", is_flag=True, help="Skip downloading vendored files.")
+def build_command(refresh_vendor, offline):
+    """Vendor, fingerprint and precompress everything under static/."""
+    static_folder = current_app.static_folder
+    if not offline:
+        try:
+            for name in fetch_vendor_assets(static_folder, refresh=refresh_vendor):
+                click.echo(f"Vendored {name}")
+        except OSError as exc:
+            click.echo(f"Could not download vendored assets: {exc}", err=True)
+            sys.exit(1)
+    missing = [name for name in VENDOR_ASSETS if not vendored(static_folder, name)]
+    if missing:
+        click.echo(f"Not vendored (served from upstream): {', '.join(missing)}", err=True)
+    manifest = build_assets(static_folder)
+    click.echo(f"Built {len(manifest)} assets into {os.path.join(static_folder, DIST_DIR)}.")
+
+@assets_cli.command("clean")
+def clean_command():
+    """Remove static/dist/; url_for('static') goes back to plain filenames."""
+    shutil.rmtree(os.path.join(current_app.static_folder, DIST_DIR), ignore_errors=True)
+    click.echo("Built assets removed.")
@@ -0,0 +1,61 @@
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from services.replicas import make_read_only, read_bind_key, replica_keys
+from services.sqlite_profile import profile_app_engine
+
+# asyncio engines for the views served from asgi.py: the same databases,
+# binds and engine options as Flask-SQLAlchemy, through an asyncio driver.
+# Queries are the ordinary sync query code run with run_sync(), so both
+# paths issue identical SQL. Engines belong to the event loop that first
+# used them (one per ASGI worker) and are created on first use.
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mssql": "mssql+aioodbc",
+}
+
+def async_database_url(uri):
+    url = sa.engine.make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"no asyncio driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def async_engine(key=None):
+    """The asyncio engine for a bind key (None: the primary database)."""
+    engines = current_app.extensions.setdefault("async_engines", {})
+    if key not in engines:
+        config = current_app.config
+        uri = config["SQLALCHEMY_DATABASE_URI"] if key is None else config["SQLALCHEMY_BINDS"][key]
+        url = async_database_url(uri)
+        options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+        if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+            # one worker has many requests waiting at once, not a few threads
+            options["pool_size"] = config["ASYNC_POOL_SIZE"]
+        engine = create_async_engine(url, **options)
+        # connection events go on the sync engine the async one wraps
+        profile_app_engine(current_app, engine.sync_engine)
+        if key in replica_keys(current_app):
+            make_read_only(engine.sync_engine)
+        engines[key] = engine
+    return engines[key]
+
+async def run_read(fn):
+    """
+    fn(connection) on the database this request reads from (a replica when
+    routed there), awaited instead of blocking. fn is plain sync SQLAlchemy
+    code; its result must not hold on to the connection.
+    """
+    async with async_engine(read_bind_key()).connect() as conn:
+        return await conn.run_sync(fn)
+
+async def get(model, ident):
+    """session.get() on the read database; the instance comes back detached."""
+    async with AsyncSession(async_engine(read_bind_key())) as session:
+        return await session.get(model, ident)
+
+async def dispose_async_engines(app):
+    for engine in app.extensions.pop("async_engines", {}).values():
+        await engine.dispose()
@@ -0,0 +1,133 @@
+from collections import namedtuple
+import sqlalchemy as sa
+from models import db, Product
+from services.search import apply_search
+from services.fragment_cache import card_cache
+from services.async_db import run_read
+from services.query_cache import cached_query, cached_query_async, bump_catalog_version
+from services.suggest import suggest_index
+from utils.pagination import keyset_paginate
+
+# Only the columns a listing card needs -- notably the stored excerpt
+# instead of the unbounded description -- fetched as plain rows.
+LISTING_COLUMNS = (
+    Product.id, Product.title, Product.excerpt, Product.price_cents,
+    Product.thumbnail_key, Product.created_at, Product.updated_at,
+)
+
+# immutable listing row; safe to share between requests and threads
+# through the query cache
+ProductRow = namedtuple("ProductRow", [c.key for c in LISTING_COLUMNS])
+
+# longest search text used, and the price bounds (whole units) a filter is
+# clamped to, so neither a huge query nor an out-of-range integer reaches
+# the database
+MAX_QUERY_LENGTH = 200
+MAX_PRICE = 10_000_000
+
+def _price(args, name):
+    value = args.get(name, type=int)
+    return None if value is None else max(0, min(value, MAX_PRICE))
+
+def product_filters(args) -> dict:
+    """Read the storefront listing filters from request args."""
+    return {
+        "q":          args.get("q", "")[:MAX_QUERY_LENGTH].strip(),
+        "min_price":  _price(args, "min_price"),
+        "max_price":  _price(args, "max_price"),
+        "category":   args.get("category", "").strip(),
+        "media_type": args.get("media_type", "").strip().lower(),
+    }
+
+def filter_products(filters: dict, query=None, dialect=None):
+    """
+    Apply listing filters to a Product query (ORM Query or Core select).
+    Returns (query, rank); rank is the relevance expression when searching.
+    """
+    products_q = Product.query if query is None else query
+    rank = None
+
+    if filters["q"]:
+        if dialect is None:
+            dialect = db.session.get_bind().dialect.name
+        products_q, rank = apply_search(products_q, filters["q"], dialect)
+    if filters["min_price"] is not None:
+        products_q = products_q.filter(Product.price_cents >= filters["min_price"] * 100)
+    if filters["max_price"] is not None:
+        products_q = products_q.filter(Product.price_cents <= filters["max_price"] * 100)
+    if filters["category"]:
+        products_q = products_q.filter(Product.category == filters["category"])
+    if filters["media_type"]:
+        # mime types are stored lower-case
+        media_type = filters["media_type"]
+        if "/" in media_type:
+            # an exact type, as offered by the facet dropdown; equality lets
+            # the (mime_type, created_at, id) index serve the listing order too
+            products_q = products_q.filter(Product.mime_type == media_type)
+        else:
+            # a bare top-level type ("video", from older links): every
+            # subtype, as the range ["video/", "video0"). Seeking it in the
+            # mime_type index would mean sorting every match, so the column
+            # is wrapped to keep the planner on the newest-first index,
+            # which it walks with the range as a filter until the page is full
+            mime_type = Product.mime_type.concat("")
+            products_q = products_q.filter(mime_type >= media_type + "/",
+                                           mime_type < media_type + "0")
+
+    return products_q, rank
+
+def sort_keys(rank=None):
+    """
+    Unique sort key for the listing, as (columns, descending).
+    Browsing is newest first; searching is most relevant first.
+    """
+    if rank is not None:
+        return (rank, Product.id), False
+    return (Product.created_at, Product.id), True
+
+def listing_rows(filters, per_page, after=None, before=None, connection=None):
+    """
+    One keyset page of the filtered storefront listing as ProductRow tuples.
+    Runs a Core select of LISTING_COLUMNS, so no ORM objects are built and
+    nothing enters the session's identity map.
+    """
+    conn = connection if connection is not None else db.session.connection()
+    stmt, rank = filter_products(filters, sa.select(*LISTING_COLUMNS), conn.dialect.name)
+    keys, descending = sort_keys(rank)
+    width = len(LISTING_COLUMNS)
+    return keyset_paginate(
+        stmt, keys, per_page, after=after, before=before, descending=descending,
+        fetch=lambda s: conn.execute(s).all(),
+        make_item=lambda row: ProductRow._make(row[:width]),
+    )
+
+def filters_key(filters):
+    """Normalized, hashable form of the listing filters."""
+    return (
+        " ".join(filters["q"].lower().split()),
+        filters["min_price"],
+        filters["max_price"],
+        filters["category"],
+        filters["media_type"],
+    )
+
+def cached_listing_page(filters, per_page, after=None, before=None):
+    """listing_rows(), served from the query cache while the catalog is unchanged."""
+    def compute():
+        return listing_rows(filters, per_page, after=after, before=before)
+
+    return cached_query(("listing", filters_key(filters), after, before, per_page), compute)
+
+async def cached_listing_page_async(filters, per_page, after=None, before=None):
+    """cached_listing_page() for async views; shares its cache entries."""
+    def compute():
+        return run_read(lambda conn: listing_rows(filters, per_page, after=after,
+                                                  before=before, connection=conn))
+
+    return await cached_query_async(("listing", filters_key(filters), after, before, per_page), compute)
+
+def catalog_changed(product_id):
+    """Call after committing a product create/edit/restock/delete."""
+    card_cache.invalidate(product_id)
+    bump_catalog_version()
+    suggest_index.patch(product_id)
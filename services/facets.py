@@ -0,0 +1,127 @@
+import click
+import sqlalchemy as sa
+from flask.cli import AppGroup
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Product, ProductFacet
+from services.async_db import run_read
+from services.query_cache import cached_query, cached_query_async, bump_catalog_version
+
+# facet kind -> Product attribute it summarises
+FACET_ATTRS = {"category": "category", "media_type": "mime_type"}
+
+facet_table = ProductFacet.__table__
+
+# INSERT ... ON CONFLICT DO UPDATE; other dialects update, then insert
+UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def _bump(connection, kind, value, products, in_stock):
+    """Adjust one facet's counters; creates or drops the row as needed."""
+    if not value or (products == 0 and in_stock == 0):
+        return
+    match = sa.and_(facet_table.c.kind == kind, facet_table.c.value == value)
+    upsert = UPSERTS.get(connection.dialect.name)
+    if products > 0 and upsert is not None:
+        # one statement, so two writers adding the first product of a new
+        # value cannot both try to insert its row
+        stmt = upsert(facet_table).values(
+            kind=kind, value=value, product_count=products, in_stock_count=in_stock,
+        )
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[facet_table.c.kind, facet_table.c.value],
+            set_={
+                "product_count": facet_table.c.product_count + stmt.excluded.product_count,
+                "in_stock_count": facet_table.c.in_stock_count + stmt.excluded.in_stock_count,
+            },
+        ))
+        return
+    result = connection.execute(
+        facet_table.update().where(match).values(
+            product_count=facet_table.c.product_count + products,
+            in_stock_count=facet_table.c.in_stock_count + in_stock,
+        )
+    )
+    if result.rowcount == 0 and products > 0:
+        connection.execute(facet_table.insert().values(
+            kind=kind, value=value, product_count=products, in_stock_count=in_stock,
+        ))
+    elif products < 0:
+        connection.execute(facet_table.delete().where(
+            sa.and_(match, facet_table.c.product_count <= 0)
+        ))
+
+def _in_stock(stock):
+    return 1 if stock and stock > 0 else 0
+
+def _old_and_new(target, attr):
+    new = getattr(target, attr)
+    history = sa.inspect(target).attrs[attr].history
+    if not history.has_changes():
+        return new, new
+    return (history.deleted[0] if history.deleted else None), new
+
+# Mapper events run inside the flush, so facet counts commit (or roll back)
+# together with the product change that caused them.
+
+@sa.event.listens_for(Product, "after_insert")
+def _product_inserted(mapper, connection, target):
+    for kind, attr in FACET_ATTRS.items():
+        _bump(connection, kind, getattr(target, attr), 1, _in_stock(target.stock))
+
+@sa.event.listens_for(Product, "after_delete")
+def _product_deleted(mapper, connection, target):
+    for kind, attr in FACET_ATTRS.items():
+        _bump(connection, kind, getattr(target, attr), -1, -_in_stock(target.stock))
+
+@sa.event.listens_for(Product, "after_update")
+def _product_updated(mapper, connection, target):
+    old_stock, new_stock = _old_and_new(target, "stock")
+    was_in, now_in = _in_stock(old_stock), _in_stock(new_stock)
+    for kind, attr in FACET_ATTRS.items():
+        old, new = _old_and_new(target, attr)
+        if old == new:
+            _bump(connection, kind, new, 0, now_in - was_in)
+        else:
+            _bump(connection, kind, old, -1, -was_in)
+            _bump(connection, kind, new, 1, now_in)
+
+def facet_rows(connection, kind):
+    """[(value, product_count), ...] for one facet, ordered by value."""
+    return [tuple(row) for row in connection.execute(
+        sa.select(facet_table.c.value, facet_table.c.product_count)
+        .where(facet_table.c.kind == kind)
+        .order_by(facet_table.c.value)
+    )]
+
+def facet_counts(kind):
+    """facet_rows(), served from the query cache."""
+    return cached_query(("facets", kind), lambda: facet_rows(db.session.connection(), kind))
+
+async def facet_counts_async(kind):
+    """facet_counts() for async views; shares its cache entries."""
+    return await cached_query_async(("facets", kind),
+                                    lambda: run_read(lambda conn: facet_rows(conn, kind)))
+
+def rebuild_facets(engine=None):
+    """Recompute every facet from the product table."""
+    with (engine or db.engine).begin() as conn:
+        conn.execute(facet_table.delete())
+        for kind, attr in FACET_ATTRS.items():
+            column = getattr(Product, attr)
+            conn.execute(facet_table.insert().from_select(
+                ["kind", "value", "product_count", "in_stock_count"],
+                sa.select(
+                    sa.literal(kind),
+                    column,
+                    sa.func.count(),
+                    sa.func.sum(sa.case((Product.stock > 0, 1), else_=0)),
+                ).where(column.isnot(None), column != "").group_by(column),
+            ))
+
+facets_cli = AppGroup("facets", help="Storefront facet summary commands.")
+
+@facets_cli.command("rebuild")
+def rebuild_command():
+    """Recompute facet counts from the product table."""
+    rebuild_facets()
+    bump_catalog_version()
+    click.echo("Facets rebuilt.")
@@ -0,0 +1,23 @@
+from flask import current_app
+from markupsafe import Markup
+from config import Config
+from utils.cache import LRUCache
+
+# rendered listing cards, validated against Product.updated_at so that
+# edits made through another worker are picked up too
+card_cache = LRUCache(Config.CARD_CACHE_SIZE)
+
+def render_product_cards(products):
+    """Listing card HTML for each product, rendering only cache misses."""
+    template = None
+    cards = []
+    for p in products:
+        stamp = p.updated_at or p.created_at
+        html = card_cache.get(p.id, stamp)
+        if html is None:
+            if template is None:
+                template = current_app.jinja_env.get_template("partials/product_card.html")
+            html = Markup(template.render(p=p))
+            card_cache.set(p.id, stamp, html)
+        cards.append(html)
+    return cards
@@ -0,0 +1,215 @@
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import click
+from flask import current_app, has_request_context
+from flask.cli import AppGroup
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from services.perf import percentile, timed
+
+# Password hashing off the request threads. Werkzeug's scrypt burns tens of
+# milliseconds of CPU while holding the GIL, so hashing inline stalls every
+# other request of the worker. Each worker process hashes in a small process
+# pool instead, and the request thread waits for the result without the GIL.
+# At most HASH_QUEUE_LIMIT hashes may be queued or running per worker; past
+# that, or when a result takes longer than HASH_TIMEOUT, the request fails
+# fast with 503 and Retry-After rather than piling up behind the pool.
+# Outside of a request (CLI commands, scripts), or with HASH_POOL_SIZE=0,
+# hashing runs inline.
+#
+# The pool's processes start from a forkserver, and multiprocessing imports
+# the program's __main__ module in each of them. gunicorn, uvicorn and the
+# flask CLI guard theirs; a script that serves requests through the app
+# (e.g. a test client driver) needs an `if __name__ == "__main__":` guard.
+#
+# New hashes use PASSWORD_HASH_METHOD, a werkzeug method string such as
+# "scrypt:32768:8:1" or "pbkdf2:sha256:1000000"; `flask hashing calibrate`
+# suggests one for a target verify time on this hardware. Stored hashes keep
+# the parameters they were made with, so User.check_password re-hashes on a
+# successful login when those differ from the configured ones.
+
+class HashingBusy(ServiceUnavailable):
+    description = "Too many sign-ins are being processed. Please try again in a moment."
+
+class HashPool:
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.in_flight = 0  # queued or running, including abandoned ones
+        self.submitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waits = deque(maxlen=window)  # ms from submit to result
+
+    def _pool(self, size):
+        # per process: gunicorn forks its workers after the app is imported
+        if self._executor is None or self._pid != os.getpid():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["werkzeug.security"])
+            self._executor = ProcessPoolExecutor(size, mp_context=context)
+            self._pid = os.getpid()
+        return self._executor
+
+    def _done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _busy(self):
+        return HashingBusy(retry_after=current_app.config["HASH_RETRY_AFTER"])
+
+    def run(self, fn, *args):
+        """fn(*args) in the pool; HashingBusy (503) when saturated or too slow."""
+        config = current_app.config
+        if config["HASH_POOL_SIZE"] <= 0 or not has_request_context():
+            with timed("hash"):
+                return fn(*args)
+
+        with self._lock:
+            if self.in_flight >= config["HASH_QUEUE_LIMIT"]:
+                self.rejected += 1
+                raise self._busy()
+            try:
+                future = self._pool(config["HASH_POOL_SIZE"]).submit(fn, *args)
+            except BrokenProcessPool:
+                self._executor = None  # a child died; start over on the next call
+                raise self._busy()
+            self.in_flight += 1
+            self.submitted += 1
+        future.add_done_callback(self._done)
+
+        started = time.perf_counter()
+        with timed("hash"):
+            try:
+                result = future.result(timeout=config["HASH_TIMEOUT"])
+            except FutureTimeout:
+                future.cancel()  # frees the slot unless it is already running
+                with self._lock:
+                    self.timed_out += 1
+                raise self._busy()
+            except BrokenProcessPool:
+                with self._lock:
+                    self._executor = None
+                raise self._busy()
+        with self._lock:
+            self._waits.append((time.perf_counter() - started) * 1000)
+        return result
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "p50": percentile(waits, 50),
+                "p95": percentile(waits, 95),
+                "p99": percentile(waits, 99),
+            }
+
+hash_pool = HashPool()
+
+# werkzeug's parameter defaults, by position after the method name
+HASH_DEFAULTS = {
+    "scrypt": (2**15, 8, 1),
+    "pbkdf2": ("sha256", DEFAULT_PBKDF2_ITERATIONS),
+}
+
+def hash_method(method):
+    """
+    The full werkzeug method string, defaults filled in per position:
+    "scrypt" -> "scrypt:32768:8:1", "scrypt:16384" -> "scrypt:16384:8:1".
+    """
+    name, *args = method.split(":")
+    defaults = HASH_DEFAULTS.get(name)
+    if defaults is None or len(args) > len(defaults):
+        raise ValueError(f"unknown password hash method {method!r}")
+    return ":".join(map(str, [name, *args, *defaults[len(args):]]))
+
+def needs_rehash(pwhash):
+    """True if pwhash was made with other parameters than PASSWORD_HASH_METHOD."""
+    stored = pwhash.split("$", 1)[0]
+    return stored != hash_method(current_app.config["PASSWORD_HASH_METHOD"])
+
+def hash_password(password):
+    return hash_pool.run(generate_password_hash, password,
+                         hash_method(current_app.config["PASSWORD_HASH_METHOD"]))
+
+def verify_password(pwhash, password):
+    return hash_pool.run(check_password_hash, pwhash, password)
+
+# ---------------------------------------------------------------- CLI
+
+hashing_cli = AppGroup("hashing", help="Password hashing commands.")
+
+def _candidates(algorithm, max_memory_mb):
+    """Parameter strings from cheapest to most expensive."""
+    if algorithm == "scrypt":
+        for log_n in range(12, 21):
+            # scrypt needs 128 * n * r bytes per hash, per hashing process
+            if 128 * 2**log_n * 8 > max_memory_mb * 1024 * 1024:
+                break
+            yield f"scrypt:{2**log_n}:8:1"
+    else:
+        iterations = 100_000
+        while iterations <= 10_000_000:
+            yield f"pbkdf2:sha256:{iterations}"
+            iterations = iterations * 3 // 2
+
+def _verify_ms(method, samples):
+    pwhash = generate_password_hash("calibration-password", method)
+    times = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        check_password_hash(pwhash, "calibration-password")
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+@hashing_cli.command("calibrate")
+@click.option("--algorithm", type=click.Choice(["scrypt", "pbkdf2"]), default="scrypt")
+@click.option("--target-ms", type=float, default=100.0, show_default=True,
+              help="Verify time to aim for, per login.")
+@click.option("--samples", type=int, default=5, show_default=True)
+@click.option("--max-memory-mb", type=int, default=64, show_default=True,
+              help="scrypt memory per hash.")
+def calibrate_command(algorithm, target_ms, samples, max_memory_mb):
+    """Time candidate parameters on this machine and suggest PASSWORD_HASH_METHOD."""
+    current = hash_method(current_app.config["PASSWORD_HASH_METHOD"])
+    chosen = None
+    for method in _candidates(algorithm, max_memory_mb):
+        elapsed = _verify_ms(method, samples)
+        mark = " (current)" if method == current else ""
+        click.echo(f"{method:<28} {elapsed:>8.1f} ms{mark}")
+        if elapsed > target_ms:
+            break
+        chosen = method
+    if chosen is None:
+        raise click.ClickException(f"even the cheapest {algorithm} parameters take "
+                                   f"more than {target_ms:.0f} ms")
+    click.echo(f"\nPASSWORD_HASH_METHOD={chosen}")
+    if chosen != current:
+        click.echo("Existing hashes are upgraded as their users log in "
+                   "(flask hashing status shows progress).")
+
+@hashing_cli.command("status")
+def status_command():
+    """Count stored password hashes by their parameters."""
+    from models import User, db
+
+    current = hash_method(current_app.config["PASSWORD_HASH_METHOD"])
+    counts = {}
+    for (pwhash,) in db.session.query(User.password_hash).yield_per(10_000):
+        method = pwhash.split("$", 1)[0]
+        counts[method] = counts.get(method, 0) + 1
+    for method, count in sorted(counts.items(), key=lambda item: -item[1]):
+        mark = " (current)" if method == current else ""
+        click.echo(f"{method:<28} {count:>10}{mark}")
@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import click
+from flask import current_app, request
+from flask.cli import AppGroup
+from werkzeug.exceptions import TooManyRequests
+
+from utils.local_db import LocalSQLite
+
+# Login throttling, checked before the user lookup and before any password
+# hashing, so a credential-stuffing run costs one small SQLite transaction
+# per attempt instead of a database query plus a scrypt.
+#
+# Every attempt takes a token from two buckets: one for the client IP and
+# one for the account it names. A bucket holds up to *_BURST tokens and
+# refills at *_PER_MINUTE. An attempt that finds a bucket empty starts a
+# lockout of LOGIN_LOCKOUT_SECONDS, doubling with each further lockout up to
+# LOGIN_LOCKOUT_MAX; the count resets once the bucket has refilled. A
+# successful login gives the IP its token back (offices behind one NAT) and
+# clears the account's bucket.
+#
+# State lives in a SQLite file shared by every worker on the host
+# (LOGIN_THROTTLE_DB, default <instance>/login-throttle.db), one row per key.
+# LOGIN_THROTTLE_BACKEND=memory keeps it per process instead.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL, updated REAL,
+                                   locked_until REAL, lockouts INTEGER) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bucket_updated ON bucket (updated);
+"""
+
+class LoginThrottled(TooManyRequests):
+    description = "Too many sign-in attempts. Please wait before trying again."
+
+# (tokens, updated, locked_until, lockouts)
+def _fresh(burst, now):
+    return (float(burst), now, 0.0, 0)
+
+def _attempt(state, now, burst, per_minute, lockout, lockout_max):
+    """New state for one attempt, the seconds to wait if it is refused, and
+    whether this attempt started a lockout."""
+    tokens, updated, locked_until, lockouts = state
+    if now < locked_until:
+        return state, locked_until - now, False
+    tokens = min(burst, tokens + (now - updated) * per_minute / 60)
+    if tokens >= burst:
+        lockouts = 0  # quiet long enough to forget earlier lockouts
+    if tokens < 1:
+        duration = min(lockout * 2 ** lockouts, lockout_max)
+        return (tokens, now, now + duration, lockouts + 1), duration, True
+    return (tokens - 1, now, 0.0, lockouts), None, False
+
+class MemoryStore:
+    """Buckets in this process only (tests, a single worker)."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, keys, change, now):
+        with self._lock:
+            states = {key: self._buckets.get(key) for key in keys}
+            for key, state in change(states).items():
+                self._buckets[key] = state
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+    def locked(self, now):
+        with self._lock:
+            return [(key, state[2] - now, state[3]) for key, state in self._buckets.items()
+                    if state[2] > now]
+
+    def clear(self, key=None):
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+class SQLiteStore:
+    """Buckets in a SQLite file shared by every worker process on the host."""
+
+    PRUNE_EVERY = 1000  # updates between deletes of idle rows
+
+    def __init__(self, path, idle_seconds):
+        # synchronous=OFF: throttle state may be lost in a crash
+        self.db = LocalSQLite(path, SCHEMA, synchronous="OFF")
+        self.idle_seconds = idle_seconds  # a row idle this long equals a fresh one
+        self._updates = 0
+
+    def update(self, keys, change, now):
+        with self.db.transaction() as conn:
+            states = dict.fromkeys(keys)
+            rows = conn.execute(
+                "SELECT key, tokens, updated, locked_until, lockouts FROM bucket "
+                f"WHERE key IN ({','.join('?' * len(keys))})", list(keys))
+            for key, *state in rows:
+                states[key] = tuple(state)
+            conn.executemany(
+                "INSERT OR REPLACE INTO bucket VALUES (?, ?, ?, ?, ?)",
+                [(key, *state) for key, state in change(states).items()])
+            self._updates += 1
+            if self._updates % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM bucket WHERE updated < ? AND locked_until < ?",
+                             (now - self.idle_seconds, now))
+
+    def locked(self, now):
+        rows = self.db.connect().execute(
+            "SELECT key, locked_until - ?, lockouts FROM bucket WHERE locked_until > ? "
+            "ORDER BY locked_until DESC", (now, now))
+        return rows.fetchall()
+
+    def clear(self, key=None):
+        if key is None:
+            self.db.connect().execute("DELETE FROM bucket")
+        else:
+            self.db.connect().execute("DELETE FROM bucket WHERE key = ?", (key,))
+
+class LoginThrottle:
+    def __init__(self):
+        self._store = None
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.refused = 0
+        self.lockouts = 0
+
+    def store(self):
+        with self._lock:
+            if self._store is None:
+                self._store = self._open_store()
+            return self._store
+
+    def _open_store(self):
+        config = current_app.config
+        if config["LOGIN_THROTTLE_BACKEND"] == "memory":
+            return MemoryStore()
+        path = (config["LOGIN_THROTTLE_DB"]
+                or os.path.join(current_app.instance_path, "login-throttle.db"))
+        idle = max(config["LOGIN_LOCKOUT_MAX"],
+                   60 * config["LOGIN_IP_BURST"] / config["LOGIN_IP_PER_MINUTE"],
+                   60 * config["LOGIN_ACCOUNT_BURST"] / config["LOGIN_ACCOUNT_PER_MINUTE"])
+        return SQLiteStore(path, idle)
+
+    def _limits(self, key):
+        config = current_app.config
+        kind = "IP" if key.startswith("ip:") else "ACCOUNT"
+        return (config[f"LOGIN_{kind}_BURST"], config[f"LOGIN_{kind}_PER_MINUTE"],
+                config["LOGIN_LOCKOUT_SECONDS"], config["LOGIN_LOCKOUT_MAX"])
+
+    def check(self, account):
+        """Charge one attempt for this client and account; LoginThrottled (429) if refused."""
+        if not current_app.config["LOGIN_THROTTLE"]:
+            return
+        now = time.time()
+        waits = {}
+
+        def change(states):
+            updated = {}
+            for key, state in states.items():
+                limits = self._limits(key)
+                state, wait, started = _attempt(state or _fresh(limits[0], now), now, *limits)
+                updated[key] = state
+                if wait is not None:
+                    waits[key] = (wait, started)
+            if waits:
+                # refused: only the buckets that refused it change
+                return {key: updated[key] for key in waits}
+            return updated
+
+        self.store().update([f"ip:{client_ip()}", account], change, now)
+        with self._lock:
+            if not waits:
+                self.allowed += 1
+                return
+            self.refused += 1
+            self.lockouts += sum(1 for _, started in waits.values() if started)
+        raise LoginThrottled(retry_after=max(1, int(max(w for w, _ in waits.values()) + 0.999)))
+
+    def succeeded(self, account):
+        """Refund the client's token and forget the account's failures."""
+        if not current_app.config["LOGIN_THROTTLE"]:
+            return
+        now = time.time()
+        ip = f"ip:{client_ip()}"
+
+        def change(states):
+            burst, per_minute, *_ = self._limits(ip)
+            tokens, updated, locked_until, lockouts = states[ip] or _fresh(burst, now)
+            return {ip: (min(burst, tokens + 1), updated, locked_until, lockouts),
+                    account: _fresh(self._limits(account)[0], now)}
+
+        self.store().update([ip, account], change, now)
+
+    def stats(self):
+        with self._lock:
+            return {"allowed": self.allowed, "refused": self.refused, "lockouts": self.lockouts}
+
+login_throttle = LoginThrottle()
+
+def client_ip():
+    """The client address, skipping LOGIN_PROXY_HOPS trusted proxies in X-Forwarded-For."""
+    hops = current_app.config["LOGIN_PROXY_HOPS"]
+    if hops:
+        forwarded = [a.strip() for a in request.headers.get("X-Forwarded-For", "").split(",")]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.remote_addr or "unknown"
+
+# ---------------------------------------------------------------- CLI
+
+throttle_cli = AppGroup("throttle", help="Login throttle commands.")
+
+@throttle_cli.command("status")
+def status_command():
+    """List locked-out IPs and accounts."""
+    locked = login_throttle.store().locked(time.time())
+    for key, remaining, lockouts in locked:
+        click.echo(f"{key:<50} {remaining:>8.0f}s  lockout #{lockouts}")
+    click.echo(f"{len(locked)} locked out.")
+
+@throttle_cli.command("clear")
+@click.argument("key", required=False)
+def clear_command(key):
+    """Unlock KEY (ip:<address>, user:<email>, admin:<name>), or everything."""
+    login_throttle.store().clear(key)
+    click.echo(f"Cleared {key or 'all keys'}.")
@@ -1,15 +1,19 @@
-import stripe
 from flask import current_app, url_for
+from services.perf import timed_call
 
 def init_stripe():
+    """Import and configure the Stripe SDK on first checkout, not at boot."""
+    import stripe
     stripe.api_key = current_app.config["STRIPE_SECRET_KEY"]
+    return stripe
 
+@timed_call("stripe")
 def create_checkout_session(items, customer_email: str):
     """
     items: list of dicts {name, quantity, unit_amount, currency}
     Returns Stripe Checkout Session URL and payment_intent id.
     """
-    init_stripe()
+    stripe = init_stripe()
     session = stripe.checkout.Session.create(
         mode="payment",
         payment_method_types=["card"],
@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy.engine import Engine
+
+# Per-request timings, exposed as a Server-Timing header and aggregated
+# per endpoint for the admin performance page. Aggregates are per worker.
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.external_ms = defaultdict(float)  # "storage", "stripe", ...
+        self._template_starts = []
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self, total_ms):
+        parts = [
+            f'db;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f"tpl;dur={self.template_ms:.1f}",
+        ]
+        parts += [f"{name};dur={ms:.1f}" for name, ms in self.external_ms.items()]
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+def current_timings():
+    return g.get("perf") if has_request_context() else None
+
+@contextmanager
+def timed(name):
+    """Attribute the enclosed block to an external service, e.g. timed("stripe")."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings()
+        if timings is not None:
+            timings.external_ms[name] += (time.perf_counter() - start) * 1000
+
+def timed_call(name):
+    """Decorator form of timed()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class EndpointStats:
+    """Rolling window of the last `window` requests per endpoint."""
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, total_ms, sql_count, sql_ms, template_ms):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append((total_ms, sql_count, sql_ms, template_ms))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        """One row per endpoint, slowest p95 first."""
+        with self._lock:
+            snapshot = {endpoint: list(s) for endpoint, s in self._samples.items()}
+        rows = []
+        for endpoint, samples in snapshot.items():
+            totals = sorted(s[0] for s in samples)
+            n = len(samples)
+            rows.append({
+                "endpoint": endpoint,
+                "count": n,
+                "p50": percentile(totals, 50),
+                "p95": percentile(totals, 95),
+                "p99": percentile(totals, 99),
+                "avg_queries": sum(s[1] for s in samples) / n,
+                "avg_db_ms": sum(s[2] for s in samples) / n,
+                "avg_template_ms": sum(s[3] for s in samples) / n,
+            })
+        return sorted(rows, key=lambda r: r["p95"], reverse=True)
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+endpoint_stats = EndpointStats(window=1000)
+
+# SQL: every engine, including ones created later
+
+@sa.event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("perf_query_start", []).append(time.perf_counter())
+
+@sa.event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["perf_query_start"].pop()
+    timings = current_timings()
+    if timings is not None:
+        timings.sql_count += 1
+        timings.sql_ms += (time.perf_counter() - started) * 1000
+
+@sa.event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute; drop its start
+    # time so the pooled connection doesn't carry it into later queries
+    conn = exception_context.connection
+    if conn is not None and exception_context.execution_context is not None:
+        stack = conn.info.get("perf_query_start")
+        if stack:
+            stack.pop()
+
+def _before_render(sender, template, context, **extra):
+    timings = current_timings()
+    if timings is not None:
+        timings._template_starts.append(time.perf_counter())
+
+def _rendered(sender, template, context, **extra):
+    timings = current_timings()
+    if timings is not None and timings._template_starts:
+        started = timings._template_starts.pop()
+        # nested renders are already inside the outer one's time
+        if not timings._template_starts:
+            timings.template_ms += (time.perf_counter() - started) * 1000
+
+def init_perf(app):
+    endpoint_stats.window = app.config["PERF_WINDOW"]
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    @app.before_request
+    def start_timing():
+        g.perf = RequestTimings()
+
+    @app.after_request
+    def finish_timing(response):
+        timings = current_timings()
+        if timings is None:
+            return response
+        total_ms = timings.total_ms
+        endpoint_stats.record(request.endpoint or "<unmatched>", total_ms,
+                              timings.sql_count, timings.sql_ms, timings.template_ms)
+        if app.config["SERVER_TIMING"]:
+            response.headers["Server-Timing"] = timings.server_timing(total_ms)
+        return response
@@ -0,0 +1,51 @@
+import os
+from flask import current_app
+from config import Config
+from utils.cache import LRUCache
+
+# storefront query results (listing pages, facet counts), shared by all
+# threads of a worker and stamped with the catalog version
+query_cache = LRUCache(Config.QUERY_CACHE_SIZE, ttl=Config.QUERY_CACHE_TTL)
+
+def _version_file():
+    return (current_app.config["CATALOG_VERSION_FILE"]
+            or os.path.join(current_app.instance_path, "catalog.version"))
+
+def catalog_version() -> int:
+    """
+    Current catalog version, shared by every worker on the host.
+    The counter is the size of an append-only file: reading it is a single
+    stat() (no SQL), and appends are atomic across processes.
+    """
+    try:
+        return os.stat(_version_file()).st_size
+    except FileNotFoundError:
+        return 0
+
+def bump_catalog_version():
+    """Invalidate cached catalog queries in every worker. Call after commit."""
+    path = _version_file()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, b".")
+    finally:
+        os.close(fd)
+
+def cached_query(key, compute):
+    """compute() once per catalog version (and TTL) for `key`."""
+    version = catalog_version()
+    value = query_cache.get(key, version)
+    if value is None:
+        value = compute()
+        query_cache.set(key, version, value)
+    return value
+
+async def cached_query_async(key, compute):
+    """cached_query() for a coroutine function `compute`."""
+    version = catalog_version()
+    value = query_cache.get(key, version)
+    if value is None:
+        value = await compute()
+        query_cache.set(key, version, value)
+    return value
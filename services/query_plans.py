@@ -0,0 +1,137 @@
+import itertools
+import os
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import click
+import sqlalchemy as sa
+from flask.cli import AppGroup
+from models import db, Product
+from services.catalog import listing_rows
+from services.seed import seed_products
+
+# Every value public.index can receive for each filter: "not set" and a
+# representative value. The check runs the full cross product.
+FILTER_CHOICES = {
+    "q":          ["", "sunset"],
+    "min_price":  [None, 20],
+    "max_price":  [None, 80],
+    "category":   ["", "portrait"],
+    "media_type": ["", "image/jpeg", "video"],
+}
+
+# a plan line that reads the whole table, or walks a whole index
+FULL_SCAN = {
+    "sqlite": re.compile(r"^SCAN (?!\w+ VIRTUAL TABLE)(\w+)(?: AS \w+)?"
+                         r"(?: USING (?:COVERING )?INDEX (\w+))?$"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+# a plan line that sorts the matching rows instead of reading them in
+# listing order from an index
+SORT = {
+    "sqlite": re.compile(r"^USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY$"),
+    "postgresql": re.compile(r"^(?:->\s*)?(?:Incremental )?Sort\b"),
+}
+
+# Browsing walks this index newest first and stops after a page, however
+# many rows the other filters skip, so a plan that scans it without sorting
+# is fine.
+ORDER_INDEX = "ix_product_created_at_id"
+
+@contextmanager
+def capture_sql(engine):
+    """Collect (statement, parameters) for everything sent to `engine`."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    sa.event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def explain(conn, statement, parameters):
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in rows]
+    return [row[0] for row in conn.exec_driver_sql("EXPLAIN " + statement, parameters)]
+
+def full_scans(dialect, plan, searching=False):
+    """
+    The plan lines that scan a table or index, or sort. Searches sort by
+    relevance, which no index holds, so their sort is expected.
+    """
+    sorts = [line for line in plan if SORT[dialect].search(line.strip())]
+    scans = []
+    for line in plan:
+        match = FULL_SCAN[dialect].search(line.strip())
+        if match and not (match.lastindex == 2 and match[2] == ORDER_INDEX and not sorts):
+            scans.append(line)
+    return scans + ([] if searching else sorts)
+
+def check_listing_plans(engine, per_page=24):
+    """
+    Run every listing filter combination (first page and a follow-on page)
+    and EXPLAIN each statement. Returns a list of (filters, sql, plan) for
+    the ones that fall back to a full table or index scan, or to sorting
+    the matches.
+    """
+    failures = []
+    with engine.connect() as conn:
+        for values in itertools.product(*FILTER_CHOICES.values()):
+            filters = dict(zip(FILTER_CHOICES, values))
+            with capture_sql(engine) as statements:
+                page = listing_rows(filters, per_page, connection=conn)
+                if page.next_cursor:
+                    listing_rows(filters, per_page, after=page.next_cursor, connection=conn)
+
+            for statement, parameters in statements:
+                plan = explain(conn, statement, parameters)
+                if full_scans(engine.dialect.name, plan, searching=bool(filters["q"])):
+                    failures.append((filters, statement, plan))
+    return failures
+
+plans_cli = AppGroup("query-plans", help="Query plan regression checks.")
+
+@plans_cli.command("check")
+@click.option("--products", default=50_000, show_default=True,
+              help="Size of the synthetic catalog to plan against.")
+@click.option("--database-url", default=None,
+              help="Scratch database to seed (default: a temporary SQLite file). "
+                   "Its product table is created and filled.")
+def check_command(products, database_url):
+    """Fail if any storefront listing query scans a whole table or sorts its matches."""
+    tmpdir = None
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = "sqlite:///" + os.path.join(tmpdir.name, "plans.db")
+
+    engine = sa.create_engine(database_url)
+    try:
+        db.metadata.create_all(engine, tables=[Product.__table__])
+        click.echo(f"Seeding {products} products...")
+        with engine.begin() as conn:
+            seed_products(conn, products)
+            conn.exec_driver_sql("ANALYZE")
+        failures = check_listing_plans(engine)
+    finally:
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if not failures:
+        click.echo("OK: every listing query uses an index.")
+        return
+
+    for filters, statement, plan in failures:
+        active = {k: v for k, v in filters.items() if v not in (None, "")}
+        click.echo(f"SCAN OR SORT for filters {active}:", err=True)
+        click.echo(f"  {statement}", err=True)
+        for line in plan:
+            click.echo(f"    {line}", err=True)
+    sys.exit(1)
@@ -0,0 +1,163 @@
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import click
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session
+from flask.cli import AppGroup
+from flask_sqlalchemy.session import Session
+
+# Read replicas, configured as SQLALCHEMY_BINDS named "replica-N" (see
+# config.py). Writes -- flushes and INSERT/UPDATE/DELETE statements -- always
+# go to the primary. Everything else goes to a replica when the current scope
+# allows it: GET/HEAD requests, and explicit read_only() blocks. After a client
+# writes, its requests read from the primary for REPLICA_STICKY_SECONDS so it
+# sees its own changes despite replica lag.
+
+REPLICA_PREFIX = "replica-"
+STICKY_KEY = "_primary_until"  # in the Flask session
+
+# explicit read_only() / use_primary() scope; overrides the request default
+_forced_route = ContextVar("db_route", default=None)
+
+def replica_keys(app):
+    return [key for key in app.config.get("SQLALCHEMY_BINDS") or {}
+            if key.startswith(REPLICA_PREFIX)]
+
+def _current_route():
+    forced = _forced_route.get()
+    if forced is not None:
+        return forced
+    if has_request_context():
+        return g.get("db_route", "primary")
+    return "primary"
+
+def read_bind_key():
+    """Bind key of the replica the current scope reads from; None for the primary."""
+    if _current_route() != "replica":
+        return None
+    keys = replica_keys(current_app)
+    if not keys:
+        return None
+    if not has_request_context():
+        return random.choice(keys)
+    if "db_replica" not in g:
+        g.db_replica = random.choice(keys)  # one replica per request
+    return g.db_replica
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing
+                and not isinstance(clause, sa.sql.dml.UpdateBase)):
+            key = read_bind_key()
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def read_only():
+    """Send this block's reads to a replica, whatever the request method."""
+    token = _forced_route.set("replica")
+    try:
+        yield
+    finally:
+        _forced_route.reset(token)
+
+@contextmanager
+def use_primary():
+    """Send this block's reads to the primary, e.g. right after a write elsewhere."""
+    token = _forced_route.set("primary")
+    try:
+        yield
+    finally:
+        _forced_route.reset(token)
+
+def _wrote():
+    """Read-your-writes: the rest of this request, and this client's next
+    requests for a while, read from the primary."""
+    if not has_request_context():
+        return
+    g.db_route = "primary"
+    sticky = current_app.config["REPLICA_STICKY_SECONDS"]
+    if replica_keys(current_app) and sticky > 0:
+        session[STICKY_KEY] = int(time.time()) + sticky
+
+@sa.event.listens_for(RoutingSession, "after_flush")
+def _after_flush(db_session, flush_context):
+    _wrote()
+
+@sa.event.listens_for(RoutingSession, "do_orm_execute")
+def _orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _wrote()
+
+def _query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+def make_read_only(engine):
+    """A write routed to this SQLite replica by mistake fails instead of diverging."""
+    if engine.dialect.name == "sqlite":
+        sa.event.listen(engine, "connect", _query_only)
+
+def init_replicas(app):
+    """Call after db.init_app(app)."""
+    keys = replica_keys(app)
+    if not keys:
+        return
+    db = app.extensions["sqlalchemy"]
+    with app.app_context():
+        for key in keys:
+            make_read_only(db.engines[key])
+
+    @app.before_request
+    def choose_db_route():
+        if request.endpoint == "static":
+            return  # no queries
+        reads_ok = request.method in ("GET", "HEAD", "OPTIONS")
+        # without a session cookie there is no deadline to read, and no
+        # reason to load the session for one
+        has_session = app.session_interface.get_cookie_name(app) in request.cookies
+        sticky = has_session and session.get(STICKY_KEY, 0) > time.time()
+        g.db_route = "replica" if reads_ok and not sticky else "primary"
+
+replicas_cli = AppGroup("replicas", help="Read replica commands.")
+
+def _sqlite_path(engine):
+    if engine.dialect.name != "sqlite" or not engine.url.database:
+        raise click.ClickException(f"{engine.url!r} is not a SQLite file database")
+    return engine.url.database
+
+@replicas_cli.command("sync")
+def sync_command():
+    """Copy the primary SQLite database over each SQLite replica (local testing)."""
+    db = current_app.extensions["sqlalchemy"]
+    keys = replica_keys(current_app)
+    if not keys:
+        raise click.ClickException("no replicas configured (SQLALCHEMY_REPLICA_URIS)")
+    source = sqlite3.connect(_sqlite_path(db.engines[None]))
+    try:
+        for key in keys:
+            db.engines[key].dispose()
+            target = sqlite3.connect(_sqlite_path(db.engines[key]))
+            try:
+                source.backup(target)  # consistent snapshot, even mid-write
+            finally:
+                target.close()
+            click.echo(f"{key}: copied from primary")
+    finally:
+        source.close()
+
+@replicas_cli.command("status")
+def status_command():
+    """Compare replicas with the primary by their latest product and order ids."""
+    db = current_app.extensions["sqlalchemy"]
+    probe = sa.text('SELECT (SELECT max(id) FROM product), (SELECT max(id) FROM "order")')
+    for key in [None] + replica_keys(current_app):
+        with db.engines[key].connect() as conn:
+            product_id, order_id = conn.execute(probe).one()
+        click.echo(f"{key or 'primary':>12}: last product {product_id}, last order {order_id}")
@@ -0,0 +1,153 @@
+import re
+from contextlib import contextmanager
+import click
+import sqlalchemy as sa
+from flask.cli import AppGroup
+from models import db, Product
+from services.query_cache import bump_catalog_version
+
+# SQLite: FTS5 external-content table over product(title, description),
+# kept in sync by triggers so every insert/update/delete on `product`
+# (admin create, edit, delete) updates the index in the same transaction.
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        title, description,
+        content='product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    # weight title matches 10x description matches; `rank` then uses this
+    "INSERT INTO product_fts(product_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+]
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF title, description ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO product_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# Postgres: stored generated tsvector column + GIN index, maintained by the
+# database itself on every write.
+POSTGRES_DDL = [
+    """
+    ALTER TABLE product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_product_search_vector ON product USING gin (search_vector)",
+]
+
+product_fts = sa.table("product_fts", sa.column("rowid"), sa.column("rank"))
+search_vector = sa.literal_column("product.search_vector")
+
+def install_search_index(connection):
+    """Create the full-text index (and its sync triggers) if missing."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            sa.text("SELECT 1 FROM sqlite_master WHERE name = 'product_fts'")
+        ).first()
+        if exists:
+            return
+        statements = SQLITE_DDL + SQLITE_TRIGGERS
+    elif dialect == "postgresql":
+        statements = POSTGRES_DDL
+    else:
+        return
+    for stmt in statements:
+        connection.execute(sa.text(stmt))
+
+@sa.event.listens_for(Product.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+def _fts5_query(q: str) -> str | None:
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word is quoted
+    (so operators in user input are inert) and the last one is a prefix.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words) + "*"
+
+def apply_search(query, q: str, dialect: str):
+    """
+    Restrict a Product query (ORM Query or Core select) to full-text
+    matches for `q` on the given database dialect.
+    Returns (query, rank) where ordering by `rank` ascending puts the most
+    relevant products first; rank is None when the backend has no ranking.
+    """
+
+    if dialect == "sqlite":
+        expr = _fts5_query(q)
+        if expr is None:
+            return query, None
+        query = (query.join(product_fts, product_fts.c.rowid == Product.id)
+                      .filter(sa.text("product_fts MATCH :fts_q").bindparams(fts_q=expr)))
+        return query, product_fts.c.rank
+
+    if dialect == "postgresql":
+        tsq = sa.func.websearch_to_tsquery("english", q)
+        query = query.filter(search_vector.op("@@")(tsq))
+        return query, -sa.func.ts_rank_cd(search_vector, tsq)
+
+    pattern = f"%{q}%"
+    return query.filter(sa.or_(Product.title.ilike(pattern),
+                               Product.description.ilike(pattern))), None
+
+@contextmanager
+def search_sync_suspended(connection):
+    """
+    For bulk loads on SQLite: drop the FTS sync triggers (which cost one
+    index write per row), then recreate them and rebuild the index once.
+    """
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+    for name in ("product_fts_ai", "product_fts_ad", "product_fts_au"):
+        connection.execute(sa.text(f"DROP TRIGGER IF EXISTS {name}"))
+    yield
+    install_search_index(connection)
+    for stmt in SQLITE_TRIGGERS:
+        connection.execute(sa.text(stmt))
+    connection.execute(sa.text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
+
+def rebuild_search_index(engine=None):
+    """Recreate the full-text index from the product table."""
+    with (engine or db.engine).begin() as conn:
+        install_search_index(conn)
+        if conn.dialect.name == "sqlite":
+            conn.execute(sa.text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
+            conn.execute(sa.text("INSERT INTO product_fts(product_fts) VALUES ('optimize')"))
+        elif conn.dialect.name == "postgresql":
+            conn.execute(sa.text("REINDEX INDEX ix_product_search_vector"))
+
+search_cli = AppGroup("search", help="Full-text search index commands.")
+
+@search_cli.command("rebuild")
+def rebuild_command():
+    """Rebuild the product full-text index."""
+    rebuild_search_index()
+    bump_catalog_version()
+    click.echo("Search index rebuilt.")
@@ -0,0 +1,323 @@
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+import sqlalchemy as sa
+from sqlalchemy.dialects import sqlite
+from werkzeug.security import generate_password_hash
+from models import db, Product, User, Order, OrderItem, make_excerpt
+from services.search import search_sync_suspended
+from services.facets import rebuild_facets
+from services.hashing import hash_method
+from services.query_cache import bump_catalog_version
+
+# Synthetic catalog, customers and order history for benchmarks, query-plan
+# checks and local development. Everything is drawn from a seeded RNG, so the
+# same arguments on an empty database always produce the same rows.
+#
+# The target is over 100k rows/s on SQLite. On one CPU, orders and items
+# reach about 90-140k rows/s and users 80-95k; products miss it at about
+# 30-35k, since a product row costs more: generating its text, then
+# rebuilding the full-text index and the secondary indexes at the end.
+
+# value -> relative frequency
+CATEGORIES = {"portrait": 30, "landscape": 22, "wedding": 14, "event": 10,
+              "stock": 9, "drone": 6, "studio": 5, "travel": 4}
+MIME_TYPES = {"image/jpeg": 55, "image/png": 12, "video/mp4": 20,
+              "video/quicktime": 5, "application/pdf": 8}
+# median price in dollars per media kind; prices are log-normal around it
+MEDIAN_PRICE = {"image": 25, "video": 80, "application": 15}
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "video/mp4": "mp4",
+              "video/quicktime": "mov", "application/pdf": "pdf"}
+WORDS = ["sunset", "city", "night", "ocean", "forest", "bride", "studio", "aerial", "golden",
+         "portrait", "mountain", "street", "retro", "film", "pack", "preset", "raw", "4k"]
+
+ORDER_SIZES = {1: 55, 2: 25, 3: 11, 4: 6, 5: 3}
+ORDER_STATUSES = {"paid": 80, "created": 12, "failed": 8}
+GUEST_ORDER_RATE = 0.15
+OUT_OF_STOCK_RATE = 0.15
+
+START = datetime(2023, 1, 1)
+
+def _weighted(choices):
+    return list(choices), list(itertools.accumulate(choices.values()))
+
+def zipf_cum_weights(n, s=0.9):
+    """Cumulative Zipf weights: rank 1 is picked most, with a long tail."""
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+def _next_id(conn, table):
+    return (conn.execute(sa.select(sa.func.max(table.c.id))).scalar() or 0) + 1
+
+def _batches(rows, batch_size):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, batch_size)):
+        yield batch
+
+@contextmanager
+def _indexes_suspended(conn, table):
+    """Drop the table's secondary indexes for a load and build each once after."""
+    for index in table.indexes:
+        index.drop(conn)
+    yield
+    for index in table.indexes:
+        index.create(conn)
+
+def _fast_bind(type_, dialect):
+    """
+    A cheaper equivalent of SQLAlchemy's bind processor for the SQLite
+    DATETIME type in its default storage format, which formats each value
+    field by field in Python: a few microseconds, per datetime column, per row.
+    """
+    impl = type_.dialect_impl(dialect)
+    if isinstance(impl, sqlite.DATETIME) and impl._storage_format == sqlite.DATETIME._storage_format:
+        return lambda value: None if value is None else value.isoformat(" ", "microseconds")
+    return None
+
+def _insert(conn, table, columns, rows, batch_size):
+    """
+    executemany of row tuples (values in `columns` order), batch_size rows
+    per call; returns the number of rows. On SQLite the tuples go straight
+    to the driver: SQLAlchemy's per-row parameter handling costs more than
+    the insert itself.
+    """
+    count = 0
+    if conn.dialect.name == "sqlite":
+        compiled = table.insert().compile(dialect=conn.dialect, column_keys=columns)
+        assert list(compiled.positiontup) == columns, "list columns in table order"
+        processors = [table.c[name].type.dialect_impl(conn.dialect).bind_processor(conn.dialect)
+                      for name in columns]
+        convert = [(i, _fast_bind(table.c[name].type, conn.dialect) or p)
+                   for i, (name, p) in enumerate(zip(columns, processors)) if p is not None]
+        for batch in _batches(rows, batch_size):
+            if convert:
+                batch = [list(row) for row in batch]
+                for values in batch:
+                    for i, process in convert:
+                        values[i] = process(values[i])
+                batch = [tuple(values) for values in batch]
+            conn.exec_driver_sql(str(compiled), batch)
+            count += len(batch)
+        return count
+
+    stmt = table.insert()
+    for batch in _batches(rows, batch_size):
+        conn.execute(stmt, [dict(zip(columns, row)) for row in batch])
+        count += len(batch)
+    if count and conn.dialect.name == "postgresql":
+        # ids were given explicitly; move the sequence past them
+        conn.execute(sa.text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                             f"(SELECT max(id) FROM \"{table.name}\"))"))
+    return count
+
+PRODUCT_COLUMNS = ["id", "title", "description", "excerpt", "price_cents", "media_key",
+                   "mime_type", "thumbnail_key", "created_at", "updated_at", "stock", "category"]
+
+def product_rows(rng, first_id, count, description_words=30):
+    """
+    Product row tuples in PRODUCT_COLUMNS order. Random values are drawn a
+    thousand rows at a time, and descriptions are word-aligned slices of one
+    long random text: the same word frequencies as per-row random text at a
+    fraction of the RNG calls.
+    """
+    words = rng.choices(WORDS, k=100_000)
+    text = " ".join(words) + " "
+    starts = list(itertools.accumulate((len(w) + 1 for w in words), initial=0))
+    lengths = range(max(1, description_words // 2), description_words * 3 // 2 + 1)
+    last_start = len(words) - lengths[-1]
+
+    titles = [" ".join(t).title() for t in itertools.permutations(WORDS, 3)]
+    categories, category_weights = _weighted(CATEGORIES)
+    mime_types, mime_weights = _weighted(MIME_TYPES)
+    stock_levels = range(100)
+    stock_weights = [OUT_OF_STOCK_RATE] + [(1 - OUT_OF_STOCK_RATE) / 99] * 99
+
+    for offset in range(0, count, 1000):
+        n = min(1000, count - offset)
+        batch = zip(
+            range(first_id + offset, first_id + offset + n),
+            rng.choices(titles, k=n),
+            rng.choices(range(last_start), k=n),
+            rng.choices(lengths, k=n),
+            rng.choices(mime_types, cum_weights=mime_weights, k=n),
+            rng.choices(categories, cum_weights=category_weights, k=n),
+            rng.choices(stock_levels, stock_weights, k=n),
+        )
+        for pid, title, word, length, mime_type, category, stock in batch:
+            kind = mime_type.split("/")[0]
+            dollars = MEDIAN_PRICE[kind] * rng.lognormvariate(0, 0.6)
+            description = text[starts[word]:starts[word + length] - 1]
+            created_at = START + timedelta(minutes=pid)
+            yield (
+                pid,
+                title,
+                description,
+                make_excerpt(description),
+                max(1, round(dollars)) * 100 - 1,  # $x.99
+                f"seed/{pid}.{EXTENSIONS[mime_type]}",
+                mime_type,
+                f"seed/thumbs/{pid}.jpg" if kind == "image" else None,
+                created_at,
+                created_at,
+                stock,
+                category,
+            )
+
+def seed_products(conn, count, batch_size=10_000, description_words=30, seed=42):
+    """Bulk-insert `count` synthetic products."""
+    rng = random.Random(seed)
+    table = Product.__table__
+    rows = product_rows(rng, _next_id(conn, table), count, description_words)
+    existing = conn.execute(sa.select(sa.func.count()).select_from(table)).scalar()
+    if count < existing:
+        return _insert(conn, table, PRODUCT_COLUMNS, rows, batch_size)
+    # the load at least doubles the table: skip per-row index and full-text
+    # maintenance and build both once at the end
+    with search_sync_suspended(conn), _indexes_suspended(conn, table):
+        return _insert(conn, table, PRODUCT_COLUMNS, rows, batch_size)
+
+def seed_users(conn, count, password="password", batch_size=10_000, seed=42, method=None):
+    """
+    Bulk-insert `count` customers, all sharing one password, hashed once
+    with `method` (default: the app's PASSWORD_HASH_METHOD, or werkzeug's
+    default outside an app context).
+    """
+    rng = random.Random(seed)
+    if method is None and has_app_context():
+        method = current_app.config["PASSWORD_HASH_METHOD"]
+    password_hash = generate_password_hash(password, *([hash_method(method)] if method else []))
+    first_id = _next_id(conn, User.__table__)
+    rows = ((uid, f"user{uid}@example.com", password_hash,
+             START + timedelta(minutes=uid * 7, seconds=rng.randrange(60)))
+            for uid in range(first_id, first_id + count))
+    return _insert(conn, User.__table__, ["id", "email", "password_hash", "joined_at"],
+                   rows, batch_size)
+
+def seed_orders(conn, count, batch_size=10_000, seed=42):
+    """
+    Bulk-insert `count` orders with their items over the existing products
+    and users. Product popularity and repeat customers both follow a Zipf
+    curve, so a few bestsellers and regulars account for most orders.
+    Returns (orders, items).
+    """
+    rng = random.Random(seed)
+    products = conn.execute(sa.select(Product.id, Product.price_cents)).all()
+    users = conn.execute(sa.select(User.id, User.email)).all()
+    if not products:
+        raise click.ClickException("seed some products before orders")
+    rng.shuffle(products)  # popularity independent of age
+    rng.shuffle(users)
+    product_weights = zipf_cum_weights(len(products))
+    user_weights = zipf_cum_weights(len(users), s=0.8) if users else None
+    sizes, size_weights = _weighted(ORDER_SIZES)
+    statuses, status_weights = _weighted(ORDER_STATUSES)
+
+    first_order = _next_id(conn, Order.__table__)
+    item_id = _next_id(conn, OrderItem.__table__)
+    orders, items = [], []
+    for offset in range(0, count, 1000):
+        n = min(1000, count - offset)
+        order_sizes = rng.choices(sizes, cum_weights=size_weights, k=n)
+        picks = iter(rng.choices(products, cum_weights=product_weights, k=sum(order_sizes)))
+        quantities = iter(rng.choices((1, 2), (9, 1), k=sum(order_sizes)))
+        customers = (rng.choices(users, cum_weights=user_weights, k=n) if users
+                     else [(None, None)] * n)
+        batch = zip(range(first_order + offset, first_order + offset + n), order_sizes,
+                    customers, rng.choices(statuses, cum_weights=status_weights, k=n))
+        for oid, size, (user_id, email), status in batch:
+            amount = 0
+            for _ in range(size):
+                product_id, price_cents = next(picks)
+                quantity = next(quantities)
+                amount += price_cents * quantity
+                items.append((item_id, oid, product_id, quantity, price_cents))
+                item_id += 1
+            if user_id is None or rng.random() < GUEST_ORDER_RATE:
+                user_id, email = None, f"guest{oid}@example.com"
+            orders.append((oid, email, amount, "usd",
+                           f"pi_seed_{oid}" if status != "created" else None,
+                           status, START + timedelta(minutes=oid * 3), user_id))
+    # orders before their items, for databases that check FKs per statement
+    _insert(conn, Order.__table__,
+            ["id", "email", "amount_cents", "currency", "stripe_payment_intent",
+             "status", "created_at", "user_id"],
+            orders, batch_size)
+    _insert(conn, OrderItem.__table__,
+            ["id", "order_id", "product_id", "quantity", "unit_price_cents"],
+            items, batch_size)
+    return len(orders), len(items)
+
+@contextmanager
+def _bulk_load_pragmas(conn):
+    """
+    On SQLite, no fsyncs for the load. The journal stays as it is (WAL
+    under the production profile), so a crash of the seeding process rolls
+    the load back and leaves the existing rows intact; only an OS crash or
+    power loss before the next checkpoint can damage the file. The
+    connection's previous setting is restored afterwards.
+    """
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+    conn.exec_driver_sql("PRAGMA synchronous = OFF")
+    conn.commit()
+    try:
+        yield
+    finally:
+        conn.exec_driver_sql(f"PRAGMA synchronous = {int(synchronous)}")
+        conn.commit()
+
+def seed_database(engine, products=0, users=0, orders=0, batch_size=10_000,
+                  description_words=30, password="password", seed=42, report=None):
+    """
+    Seed every table, one transaction per table. Facet counts are
+    recomputed afterwards (bulk inserts bypass the ORM events that
+    maintain them). report(label, rows, seconds) is called per table.
+    """
+    def step(label, fn):
+        started = time.perf_counter()
+        with engine.connect() as conn, _bulk_load_pragmas(conn):
+            with conn.begin():
+                rows = fn(conn)
+        if report:
+            report(label, rows, time.perf_counter() - started)
+
+    if products:
+        step("products", lambda conn: seed_products(conn, products, batch_size,
+                                                    description_words, seed))
+        rebuild_facets(engine)
+    if users:
+        step("users", lambda conn: seed_users(conn, users, password, batch_size, seed))
+    if orders:
+        step("orders + items", lambda conn: sum(seed_orders(conn, orders, batch_size, seed)))
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+@click.command("seed")
+@click.option("--products", default=10_000, show_default=True)
+@click.option("--users", default=1_000, show_default=True)
+@click.option("--orders", default=5_000, show_default=True,
+              help="Orders to create; each has 1-5 items.")
+@click.option("--batch-size", default=10_000, show_default=True,
+              help="Rows per executemany call.")
+@click.option("--description-words", default=30, show_default=True)
+@click.option("--password", default="password", show_default=True,
+              help="Password for every seeded user.")
+@click.option("--seed", "seed", default=42, show_default=True, help="RNG seed.")
+def seed_command(products, users, orders, batch_size, description_words, password, seed):
+    """Fill the database with synthetic products, users and orders."""
+    def report(label, rows, seconds):
+        click.echo(f"{label:>15}: {rows:>9,} rows in {seconds:6.2f}s "
+                   f"({rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+    steps = []
+    db.create_all()
+    seed_database(db.engine, products, users, orders, batch_size, description_words,
+                  password, seed, lambda *step: (steps.append(step), report(*step)))
+    report("total", sum(s[1] for s in steps), sum(s[2] for s in steps))
+    bump_catalog_version()
@@ -0,0 +1,377 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+import click
+from flask import current_app, session
+from flask.cli import AppGroup
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from itsdangerous import BadSignature
+from services.replicas import STICKY_KEY
+
+from utils.local_db import LocalSQLite
+
+try:
+    import msgpack
+except ImportError:  # sessions are written as JSON until msgpack is installed
+    msgpack = None
+
+# Server-side sessions. The cookie carries only a random id; the session
+# itself is a msgpack payload in a store shared by the workers:
+#   sqlite  <instance>/sessions.db (SESSION_DB), every worker on the host
+#   memory  an LRU of SESSION_MEMORY_SIZE sessions in this process (dev)
+#   cookie  Flask's signed cookie, as before
+# A session is loaded on first access, so requests that never read it
+# (static files, 304s, JSON endpoints) skip the lookup, and it is written
+# back only when modified. Sessions expire PERMANENT_SESSION_LIFETIME after
+# their last use; to avoid a write per request, the expiry is pushed back
+# only once less than half of it remains. Every SESSION_CLEANUP_EVERY saves,
+# and on `flask sessions cleanup`, expired rows are deleted in batches of
+# SESSION_CLEANUP_BATCH until none are left.
+#
+# An anonymous session holding nothing but LIGHT_KEYS (the CSRF token every
+# page with a form sets, flashed messages, the replica read-your-writes
+# deadline) never reaches the store: it
+# travels in the same cookie, signed like Flask's cookie sessions. It moves
+# to the store, under a new id, as soon as it holds anything else: a login,
+# a cart. Logging out moves it back.
+
+# ---------------------------------------------------------------- payload
+
+def dumps(data):
+    if msgpack is not None:
+        return b"m" + msgpack.packb(data, use_bin_type=True)
+    return b"j" + json.dumps(data, separators=(",", ":")).encode()
+
+def loads(payload):
+    """Either format, so installing or removing msgpack keeps existing sessions."""
+    if payload[:1] == b"m" and msgpack is not None:
+        return msgpack.unpackb(payload[1:], raw=False)
+    if payload[:1] == b"j":
+        return json.loads(payload[1:])
+    raise ValueError("unreadable session payload")
+
+# ---------------------------------------------------------------- stores
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session (id TEXT PRIMARY KEY, data BLOB NOT NULL,
+                                    expires REAL NOT NULL, user_id INTEGER) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS session_expires ON session (expires);
+CREATE INDEX IF NOT EXISTS session_user ON session (user_id);
+"""
+
+class MemoryStore:
+    """Sessions in this process only, the least recently used dropped first."""
+
+    def __init__(self, max_sessions):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # id -> (payload, expires, user_id)
+        self._lock = threading.Lock()
+
+    def load(self, sid, now):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None or entry[1] < now:
+                return None
+            self._sessions.move_to_end(sid)
+            return entry[0], entry[1]
+
+    def save(self, sid, payload, expires, user_id):
+        with self._lock:
+            self._sessions[sid] = (payload, expires, user_id)
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def touch(self, sid, expires):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is not None:
+                self._sessions[sid] = (entry[0], expires, entry[2])
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def cleanup(self, now, batch):
+        with self._lock:
+            expired = [sid for sid, entry in self._sessions.items() if entry[1] < now][:batch]
+            for sid in expired:
+                del self._sessions[sid]
+            return len(expired)
+
+    def count(self, now):
+        with self._lock:
+            live = [entry[2] for entry in self._sessions.values() if entry[1] >= now]
+            return len(live), sum(1 for user_id in live if user_id is not None)
+
+    def revoke_user(self, user_id):
+        with self._lock:
+            revoked = [sid for sid, entry in self._sessions.items() if entry[2] == user_id]
+            for sid in revoked:
+                del self._sessions[sid]
+            return len(revoked)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+class SQLiteStore:
+    """Sessions in a SQLite file shared by every worker process on the host."""
+
+    def __init__(self, path):
+        self.db = LocalSQLite(path, SCHEMA)
+
+    def load(self, sid, now):
+        return self.db.connect().execute(
+            "SELECT data, expires FROM session WHERE id = ? AND expires >= ?", (sid, now)).fetchone()
+
+    def save(self, sid, payload, expires, user_id):
+        self.db.connect().execute("INSERT OR REPLACE INTO session VALUES (?, ?, ?, ?)",
+                                  (sid, payload, expires, user_id))
+
+    def touch(self, sid, expires):
+        self.db.connect().execute("UPDATE session SET expires = ? WHERE id = ?", (expires, sid))
+
+    def delete(self, sid):
+        self.db.connect().execute("DELETE FROM session WHERE id = ?", (sid,))
+
+    def cleanup(self, now, batch):
+        # one short write transaction per batch, so logins are not held up
+        cursor = self.db.connect().execute(
+            "DELETE FROM session WHERE id IN "
+            "(SELECT id FROM session WHERE expires < ? LIMIT ?)", (now, batch))
+        return cursor.rowcount
+
+    def count(self, now):
+        return self.db.connect().execute(
+            "SELECT count(*), count(user_id) FROM session WHERE expires >= ?", (now,)).fetchone()
+
+    def revoke_user(self, user_id):
+        return self.db.connect().execute(
+            "DELETE FROM session WHERE user_id = ?", (user_id,)).rowcount
+
+    def clear(self):
+        self.db.connect().execute("DELETE FROM session")
+
+def open_store(app):
+    if app.config["SESSION_BACKEND"] == "memory":
+        return MemoryStore(app.config["SESSION_MEMORY_SIZE"])
+    return SQLiteStore(app.config["SESSION_DB"]
+                       or os.path.join(app.instance_path, "sessions.db"))
+
+# ---------------------------------------------------------------- Flask
+
+# keys an anonymous session may hold and still live in a signed cookie;
+# STICKY_KEY is the read-from-primary deadline a write (a registration) sets
+LIGHT_KEYS = frozenset({"csrf_token", "_flashes", "_permanent", STICKY_KEY})
+
+class _SignedCookie(SecureCookieSessionInterface):
+    salt = "anonymous-session"  # not interchangeable with SESSION_BACKEND=cookie
+
+class ServerSession(SessionMixin, MutableMapping):
+    """The request's session, read from the store (or signed cookie) on first access."""
+
+    def __init__(self, store, sid, signed=None, serializer=None, lifetime=None):
+        self.store = store
+        self.sid = sid  # None until saved; never a client-chosen id
+        self.signed = signed  # an anonymous session's signed cookie value
+        self.serializer = serializer
+        self.lifetime = lifetime
+        self.expires = None
+        self.stale_sid = None  # rotated away, deleted on save
+        self.modified = False
+        self.accessed = False
+        self._data = None
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def _load(self):
+        if self._data is None:
+            self.accessed = True
+            if self.signed is not None:
+                return self._load_signed()
+            row = self.store.load(self.sid, time.time()) if self.sid else None
+            if row is None:
+                self.sid, self._data = None, {}  # unknown, expired or revoked
+            else:
+                try:
+                    self._data = loads(row[0])
+                    self.expires = row[1]
+                except ValueError:
+                    self.sid, self._data = None, {}
+        return self._data
+
+    def _load_signed(self):
+        try:
+            data, signed_at = self.serializer.loads(self.signed, max_age=self.lifetime,
+                                                    return_timestamp=True)
+        except BadSignature:  # tampered with, or expired
+            data = None
+        if not isinstance(data, dict) or not data.keys() <= LIGHT_KEYS:
+            self.signed, self._data = None, {}
+        else:
+            self._data = data
+            self.expires = signed_at.timestamp() + self.lifetime
+        return self._data
+
+    @property
+    def light(self):
+        """
+        Holding only LIGHT_KEYS, so kept in the signed cookie. A stored
+        session goes back to the cookie when a change leaves it light
+        (logout).
+        """
+        return self._load().keys() <= LIGHT_KEYS and (self.sid is None or self.modified)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def rotate(self):
+        """Move the data to a new id, e.g. on login (session fixation)."""
+        self._load()
+        if self.sid is not None:
+            self.stale_sid, self.sid = self.sid, None
+        self.modified = True
+
+class ServerSessionInterface(SessionInterface):
+    def __init__(self, store):
+        self.store = store
+        self._saves = 0
+
+    def open_session(self, app, request):
+        sid = signed = request.cookies.get(self.get_cookie_name(app))
+        # ids from token_urlsafe never contain ".", signed values always do
+        if sid is not None and "." in sid:
+            sid = None
+        else:
+            signed = None
+        if sid is not None and not (20 <= len(sid) <= 64 and sid.isascii()):
+            sid = None
+        return ServerSession(self.store, sid, signed, _SignedCookie().get_signing_serializer(app),
+                             app.permanent_session_lifetime.total_seconds())
+
+    def save_session(self, app, session, response):
+        if not session.loaded:
+            return  # never read: nothing to write or refresh
+        response.vary.add("Cookie")
+        name = self.get_cookie_name(app)
+        domain, path = self.get_cookie_domain(app), self.get_cookie_path(app)
+
+        if session.stale_sid is not None:
+            self.store.delete(session.stale_sid)
+        if not session:
+            if session.modified and (session.sid is not None or session.signed is not None):
+                if session.sid is not None:  # emptied, e.g. logout
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        now = time.time()
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        if session.light:
+            if session.sid is not None:
+                self.store.delete(session.sid)
+                session.sid = None
+            if session.modified or session.signed is None or session.expires - now < lifetime / 2:
+                value = session.serializer.dumps(dict(session))
+            else:
+                return  # cookie already set and still valid
+        elif session.modified or session.sid is None:
+            session.sid = value = session.sid or secrets.token_urlsafe(24)
+            user_id = session.get("user_id")
+            self.store.save(session.sid, dumps(dict(session)), now + lifetime,
+                            user_id if isinstance(user_id, int) else None)
+            self._saved(app, now)
+        elif session.expires - now < lifetime / 2:
+            self.store.touch(session.sid, now + lifetime)
+            value = session.sid
+        else:
+            return  # cookie already set and still valid
+
+        response.set_cookie(name, value, expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app),
+                            partitioned=self.get_cookie_partitioned(app))
+
+    def _saved(self, app, now):
+        self._saves += 1
+        if self._saves % app.config["SESSION_CLEANUP_EVERY"] == 0:
+            sweep(self.store, now, app.config["SESSION_CLEANUP_BATCH"])
+
+def sweep(store, now, batch):
+    """Delete expired sessions a batch at a time until a batch comes back short."""
+    total = 0
+    while True:
+        deleted = store.cleanup(now, batch)
+        total += deleted
+        if deleted < batch:
+            return total
+
+def init_sessions(app):
+    if app.config["SESSION_BACKEND"] != "cookie":
+        app.session_interface = ServerSessionInterface(open_store(app))
+
+def rotate_session():
+    """Give the current session a new id; call on login. No-op for cookie sessions."""
+    if isinstance(session._get_current_object(), ServerSession):
+        session.rotate()
+
+# ---------------------------------------------------------------- CLI
+
+sessions_cli = AppGroup("sessions", help="Server-side session commands.")
+
+def _store():
+    interface = current_app.session_interface
+    if not isinstance(interface, ServerSessionInterface):
+        raise click.ClickException("sessions are cookies (SESSION_BACKEND=cookie)")
+    return interface.store
+
+@sessions_cli.command("status")
+def status_command():
+    """Count live sessions."""
+    total, users = _store().count(time.time())
+    click.echo(f"{total} live sessions, {users} signed in.")
+
+@sessions_cli.command("cleanup")
+def cleanup_command():
+    """Delete expired sessions, in batches of SESSION_CLEANUP_BATCH."""
+    total = sweep(_store(), time.time(), current_app.config["SESSION_CLEANUP_BATCH"])
+    click.echo(f"Deleted {total} expired sessions.")
+
+@sessions_cli.command("revoke")
+@click.option("--user-id", type=int, help="Sign this user out everywhere.")
+@click.option("--all", "revoke_all", is_flag=True, help="Sign everyone out.")
+def revoke_command(user_id, revoke_all):
+    """End sessions server-side."""
+    if revoke_all:
+        _store().clear()
+        click.echo("Revoked all sessions.")
+    elif user_id is not None:
+        click.echo(f"Revoked {_store().revoke_user(user_id)} sessions.")
+    else:
+        raise click.UsageError("pass --user-id or --all")
@@ -0,0 +1,61 @@
+import sqlalchemy as sa
+
+# Production settings for SQLite under several workers, applied to every new
+# connection:
+#   journal_mode=WAL     readers no longer block the writer's commit and the
+#                        writer no longer blocks readers; with the default
+#                        rollback journal either side can time out with
+#                        "database is locked" when writes spike
+#   synchronous          NORMAL is safe with WAL (a crash can lose the last
+#                        commits, never corrupt the database)
+#   busy_timeout         how long a writer waits for the write lock
+#   mmap_size/cache_size fewer read syscalls, larger page cache
+
+def apply_sqlite_profile(engine, busy_timeout_ms=5000, synchronous="NORMAL",
+                         mmap_size=256 * 1024 * 1024, cache_size_kb=65536):
+    """Install the pragmas above on a SQLite engine."""
+    pragmas = [
+        "PRAGMA journal_mode = WAL",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA busy_timeout = {int(busy_timeout_ms)}",
+        f"PRAGMA mmap_size = {int(mmap_size)}",
+        f"PRAGMA cache_size = -{int(cache_size_kb)}",  # negative: KiB rather than pages
+    ]
+
+    @sa.event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def configure_sqlite_pool(app):
+    """Pool settings for a SQLite file database. Call before db.init_app(app)."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    if not app.config["SQLITE_PROFILE"] or not uri.startswith("sqlite:///") or ":memory:" in uri:
+        return
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": app.config["SQLITE_POOL_SIZE"],
+        "max_overflow": 0,  # writes serialize anyway; more connections only add lock waits
+        "pool_timeout": app.config["SQLITE_BUSY_TIMEOUT_MS"] / 1000,
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+
+def profile_app_engine(app, engine):
+    """apply_sqlite_profile() with the app's SQLITE_* settings, if enabled."""
+    if not app.config["SQLITE_PROFILE"] or engine.dialect.name != "sqlite":
+        return
+    apply_sqlite_profile(
+        engine,
+        busy_timeout_ms=app.config["SQLITE_BUSY_TIMEOUT_MS"],
+        synchronous=app.config["SQLITE_SYNCHRONOUS"],
+        mmap_size=app.config["SQLITE_MMAP_SIZE"],
+        cache_size_kb=app.config["SQLITE_CACHE_SIZE_KB"],
+    )
+
+def init_sqlite_profile(app):
+    """Call after db.init_app(app) and before init_replicas(app)."""
+    db = app.extensions["sqlalchemy"]
+    with app.app_context():
+        for engine in db.engines.values():
+            profile_app_engine(app, engine)
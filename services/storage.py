@@ -1,13 +1,18 @@
 import os
 from flask import current_app, send_from_directory, abort
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
 from datetime import datetime, timedelta
+from services.perf import timed_call
+
+# The Azure SDK is imported on first use, so workers running
+# STORAGE_BACKEND=local never pay for loading it.
 
 def _azure_client():
+    from azure.storage.blob import BlobServiceClient
     return BlobServiceClient.from_connection_string(
         current_app.config["AZURE_STORAGE_CONNECTION_STRING"]
     )
 
+@timed_call("storage")
 def save_media(file_storage) -> tuple[str, str]:
     """
     Returns (media_key, public_url_or_path).
@@ -37,6 +42,7 @@ def serve_local_media(filename: str):
         abort(404)
     return send_from_directory(folder, filename, as_attachment=False)
 
+@timed_call("storage")
 def generate_download_url(media_key: str) -> str:
     """
     Returns a temporary, signed URL for client to download after payment.
@@ -48,6 +54,7 @@ def generate_download_url(media_key: str) -> str:
         # client will get /download?token=...
         return None  # handled at app layer via signed token
     # Azure SAS
+    from azure.storage.blob import generate_blob_sas, BlobSasPermissions
     account_name = current_app.config["AZURE_STORAGE_ACCOUNT_NAME"]
     account_key = current_app.config["AZURE_STORAGE_ACCOUNT_KEY"]
     container = current_app.config["AZURE_BLOB_CONTAINER"]
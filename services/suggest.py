@@ -0,0 +1,101 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from models import db, Product
+from services.query_cache import catalog_version
+
+def _words(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+def _keys(title):
+    """One key per word start, so "red sunset" is found by "red" and "sun"."""
+    words = _words(title)
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+class PrefixIndex:
+    """
+    Title autocomplete over a sorted array of (key, product_id) searched with
+    bisect. Built lazily from the product table, patched in place for this
+    worker's own admin writes, and rebuilt when another worker has bumped
+    the catalog version.
+    """
+
+    def __init__(self):
+        self._entries = []   # sorted [(key, product_id)]
+        self._titles = {}    # product_id -> title
+        self._version = None
+        self._built = False
+        self._lock = threading.Lock()          # guards the three fields above
+        self._rebuild_lock = threading.Lock()  # one rebuild at a time
+
+    def _build(self):
+        """(entries, titles) for the whole product table; runs without the lock."""
+        titles = dict(db.session.execute(db.select(Product.id, Product.title)).all())
+        entries = sorted((key, pid) for pid, title in titles.items() for key in _keys(title))
+        return entries, titles
+
+    def _ensure_current(self):
+        version = catalog_version()
+        if version == self._version:
+            return
+        # Build the new index outside self._lock, so searches and patches
+        # carry on against the old one, then swap it in. While one thread
+        # rebuilds, the others serve the old index unless there is none yet.
+        if not self._rebuild_lock.acquire(blocking=not self._built):
+            return
+        try:
+            if version == self._version:
+                return  # built by the thread we waited for
+            entries, titles = self._build()
+            with self._lock:
+                self._entries, self._titles, self._version = entries, titles, version
+                self._built = True
+        finally:
+            self._rebuild_lock.release()
+
+    def search(self, q, limit=8):
+        prefix = " ".join(_words(q))
+        if not prefix:
+            return []
+        self._ensure_current()
+        with self._lock:
+            results, seen = [], set()
+            i = bisect_left(self._entries, (prefix,))
+            while i < len(self._entries) and len(results) < limit:
+                key, pid = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                if pid not in seen:
+                    seen.add(pid)
+                    results.append({"id": pid, "title": self._titles[pid]})
+                i += 1
+            return results
+
+    def patch(self, product_id):
+        """
+        Re-index one product (or drop it if deleted). Call after committing
+        and bumping the catalog version for that change.
+        """
+        title = db.session.execute(
+            db.select(Product.title).where(Product.id == product_id)
+        ).scalar()
+        with self._lock:
+            version = catalog_version()
+            if self._version is None or version != self._version + 1:
+                # not built yet, or other writers changed the catalog too:
+                # leave it to the next search to rebuild
+                self._version = None
+                return
+            old = self._titles.pop(product_id, None)
+            if old is not None:
+                for key in _keys(old):
+                    i = bisect_left(self._entries, (key, product_id))
+                    if i < len(self._entries) and self._entries[i] == (key, product_id):
+                        del self._entries[i]
+            if title is not None:
+                self._titles[product_id] = title
+                for key in _keys(title):
+                    insort(self._entries, (key, product_id))
+            self._version = version
+
+suggest_index = PrefixIndex()
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+# Compiled templates persisted on disk, shared by every worker on the host.
+# A new worker loads the bytecode instead of parsing and compiling each
+# template on its first render. Entries are keyed by template name and
+# checked against a checksum of the source, so an edited template is simply
+# recompiled; `flask templates precompile` fills the cache at build time.
+
+def cache_dir(app):
+    return app.config["TEMPLATE_CACHE_DIR"] or os.path.join(app.instance_path, "jinja-cache")
+
+def init_template_cache(app):
+    if not app.config["TEMPLATE_BYTECODE_CACHE"]:
+        return
+    directory = cache_dir(app)
+    os.makedirs(directory, exist_ok=True)
+    # set on the environment itself: extensions (Talisman) may already have created it
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+templates_cli = AppGroup("templates", help="Template bytecode cache commands.")
+
+@templates_cli.command("precompile")
+def precompile_command():
+    """Compile every template into the bytecode cache; fails on syntax errors."""
+    env = current_app.jinja_env
+    if env.bytecode_cache is None:
+        raise click.ClickException("the template bytecode cache is disabled "
+                                   "(TEMPLATE_BYTECODE_CACHE=0)")
+    env.bytecode_cache.clear()
+    env.cache.clear()  # in-memory templates would skip the bytecode cache
+
+    started = time.perf_counter()
+    names = [n for n in env.list_templates() if n.endswith(".html")]
+    errors = 0
+    for name in names:
+        try:
+            env.get_template(name)
+        except TemplateSyntaxError as exc:
+            errors += 1
+            click.echo(f"{exc.filename}:{exc.lineno}: {exc.message}", err=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    click.echo(f"Compiled {len(names) - errors} templates into {cache_dir(current_app)} "
+               f"in {elapsed:.0f} ms.")
+    if errors:
+        sys.exit(1)
+
+@templates_cli.command("clear")
+def clear_command():
+    """Remove all cached template bytecode."""
+    bytecode_cache = current_app.jinja_env.bytecode_cache
+    if bytecode_cache is not None:
+        bytecode_cache.clear()
+    click.echo("Template cache cleared.")
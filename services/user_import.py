@@ -0,0 +1,208 @@
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.security import generate_password_hash
+
+from models import User, db
+from services.hashing import hash_method
+
+# Bulk user import: a CSV (header row) or JSONL file of records with an
+# `email` and either a `password` or a werkzeug `password_hash` (hashes
+# made with other parameters are upgraded at the user's first login), plus
+# an optional ISO `joined_at`. Records are read as a stream, --chunk-size
+# at a time; each chunk is checked against existing emails with one query,
+# its passwords are hashed across --workers processes and it is inserted
+# in one transaction. Hashing the next chunk overlaps with inserting the
+# previous one. After each committed chunk the number of records consumed
+# is written to a state file, which --resume picks up after an interruption.
+
+users_cli = AppGroup("users", help="User account commands.")
+
+def read_records(path, fmt):
+    """(line number, record) for each record of a CSV or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError:
+                        yield line_no, None
+
+def parse_record(record):
+    """(email, password, password_hash, joined_at) as auth.register would store them."""
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    for field in ("email", "password", "password_hash"):
+        if not isinstance(record.get(field) or "", str):
+            raise ValueError(f"{field} is not a string")
+    email = (record.get("email") or "").strip().lower()
+    password = record.get("password") or ""
+    password_hash = record.get("password_hash") or ""
+    if not email:
+        raise ValueError("no email")
+    if len(email) > 255:
+        raise ValueError("email longer than 255 characters")
+    if password_hash:
+        try:
+            method, _salt, _hash = password_hash.split("$")
+            hash_method(method)
+        except ValueError:
+            raise ValueError("password_hash is not a werkzeug hash") from None
+    elif not password:
+        raise ValueError("no password or password_hash")
+    joined_at = record.get("joined_at") or None
+    if joined_at:
+        try:
+            joined_at = datetime.fromisoformat(joined_at)
+        except (TypeError, ValueError):
+            raise ValueError(f"joined_at {joined_at!r} is not an ISO date") from None
+    return email, password, password_hash, joined_at
+
+class ImportState:
+    """Records consumed so far, kept next to the input file between runs."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if state.get("source") != self.source:
+            raise click.ClickException(f"{self.path} belongs to an import of {state.get('source')}")
+        return state["records"]
+
+    def save(self, records):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": self.source, "records": records,
+                       "updated": datetime.utcnow().isoformat()}, f)
+        os.replace(tmp, self.path)  # a crash leaves the old state or the new one
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def _existing_emails(emails):
+    table = User.__table__
+    rows = db.session.execute(sa.select(table.c.email).where(table.c.email.in_(emails)))
+    return {email for (email,) in rows}
+
+def _hash_pool(workers):
+    if workers <= 0:
+        return None
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["werkzeug.security"])
+    return ProcessPoolExecutor(workers, mp_context=context)
+
+@users_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]),
+              help="Default: from the file extension.")
+@click.option("--chunk-size", default=1000, show_default=True,
+              help="Records per duplicate check and insert transaction.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True,
+              help="Hashing processes; 0 hashes inline.")
+@click.option("--resume", is_flag=True, help="Skip the records an interrupted run committed.")
+@click.option("--state", "state_path", help="State file. Default: PATH.import-state")
+def import_command(path, fmt, chunk_size, workers, resume, state_path):
+    """Create accounts in bulk from a CSV or JSONL file of users."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    state = ImportState(state_path or path + ".import-state", path)
+    skip = state.load() if resume else 0
+    if skip:
+        click.echo(f"Resuming after {skip:,} records.")
+    method = hash_method(current_app.config["PASSWORD_HASH_METHOD"])
+
+    counts = {"read": skip, "created": 0, "duplicate": 0, "invalid": 0}
+    started = time.perf_counter()
+
+    def report(consumed):
+        elapsed = time.perf_counter() - started
+        click.echo(f"{consumed:>10,} read {counts['created']:>10,} created "
+                   f"{counts['duplicate']:>8,} duplicates {counts['invalid']:>6,} invalid "
+                   f"({counts['created'] / max(elapsed, 1e-9):,.0f} users/s)")
+
+    def prepare(chunk, pending_emails):
+        """Valid, new users of a chunk, their passwords submitted for hashing."""
+        users = {}
+        for line_no, record in chunk:
+            try:
+                email, password, password_hash, joined_at = parse_record(record)
+            except ValueError as exc:
+                counts["invalid"] += 1
+                click.echo(f"{path}:{line_no}: skipped, {exc}", err=True)
+                continue
+            if email in users or email in pending_emails:
+                counts["duplicate"] += 1
+                continue
+            users[email] = (password, password_hash, joined_at)
+        existing = _existing_emails(list(users)) if users else set()
+        counts["duplicate"] += len(existing)
+        users = {email: user for email, user in users.items() if email not in existing}
+        to_hash = [user[0] for user in users.values() if not user[1]]
+        if pool is None:
+            hashes = iter([generate_password_hash(p, method) for p in to_hash])
+        else:
+            hashes = pool.map(generate_password_hash, to_hash, itertools.repeat(method),
+                              chunksize=max(1, len(to_hash) // (4 * workers)))
+        return users, hashes
+
+    def insert(users, hashes):
+        rows = [{"email": email, "password_hash": password_hash or next(hashes),
+                 "joined_at": joined_at or datetime.utcnow()}
+                for email, (_, password_hash, joined_at) in users.items()]
+        try:
+            if rows:
+                db.session.execute(User.__table__.insert(), rows)
+            db.session.commit()
+        except sa.exc.IntegrityError:
+            # an email registered since the duplicate check; drop it and retry
+            db.session.rollback()
+            existing = _existing_emails([row["email"] for row in rows])
+            counts["duplicate"] += len(existing)
+            rows = [row for row in rows if row["email"] not in existing]
+            if rows:
+                db.session.execute(User.__table__.insert(), rows)
+            db.session.commit()
+        return len(rows)
+
+    records = itertools.islice(read_records(path, fmt), skip, None)
+    pool = _hash_pool(workers)
+    try:
+        pending = None  # (users, hashes, records consumed): hashing while the next chunk is read
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if chunk:
+                counts["read"] += len(chunk)
+                prepared = prepare(chunk, pending[0] if pending else ())
+            if pending:
+                counts["created"] += insert(pending[0], pending[1])
+                state.save(pending[2])
+                report(pending[2])
+            if not chunk:
+                break
+            pending = (*prepared, counts["read"])
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    state.clear()
+    click.echo("Done.")
@@ -0,0 +1,26 @@
+// Title suggestions for the product search box (see /api/suggest).
+(function () {
+  var input = document.querySelector("input[data-suggest-url]");
+  if (!input) return;
+  var list = document.getElementById(input.getAttribute("list"));
+  var timer = null;
+
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    var q = input.value.trim();
+    if (!q) { list.innerHTML = ""; return; }
+    timer = setTimeout(function () {
+      fetch(input.dataset.suggestUrl + "?q=" + encodeURIComponent(q))
+        .then(function (r) { return r.json(); })
+        .then(function (items) {
+          list.innerHTML = "";
+          items.forEach(function (item) {
+            var option = document.createElement("option");
+            option.value = item.title;
+            list.appendChild(option);
+          });
+        })
+        .catch(function () {});
+    }, 120);
+  });
+})();
@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+from flask.testing import FlaskClient
+
+# app.py builds the app from the environment when it is first imported, so
+# point every database and cache at a scratch directory before any test does
+_tmp = tempfile.mkdtemp(prefix="filmcompany-tests-")
+os.environ.update(
+    SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(_tmp, "app.db"),
+    SQLALCHEMY_REPLICA_URIS="",
+    SESSION_DB=os.path.join(_tmp, "sessions.db"),
+    LOGIN_THROTTLE_BACKEND="memory",
+    CATALOG_VERSION_FILE=os.path.join(_tmp, "catalog.version"),
+    TEMPLATE_CACHE_DIR=os.path.join(_tmp, "jinja-cache"),
+    HASH_POOL_SIZE="0",
+    PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",  # fast; the method is not under test
+)
+
+class HTTPSClient(FlaskClient):
+    """Requests over https: Talisman redirects plain http, and the session
+    cookie is Secure."""
+
+    def open(self, *args, **kwargs):
+        kwargs.setdefault("base_url", "https://localhost")
+        return super().open(*args, **kwargs)
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app
+    from models import db
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    app.test_client_class = HTTPSClient
+    with app.app_context():
+        db.create_all()
+    yield app
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
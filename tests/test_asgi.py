@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from urllib.parse import urlencode
+
+import pytest
+from flask import template_rendered
+
+from models import db, Product
+from services.async_db import dispose_async_engines
+from services.query_cache import bump_catalog_version
+from services.seed import seed_products
+
+async def _request(application, method, path, body=b"", headers=()):
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "https",
+        "path": path,
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"localhost")] + [(k.encode(), v.encode()) for k, v in headers],
+        "server": ("localhost", 443),
+        "client": ("127.0.0.1", 50000),
+    }
+    messages = [{"type": "http.request", "body": body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    start, *body_messages = sent
+    headers = {}
+    for name, value in start["headers"]:
+        headers.setdefault(name.decode(), []).append(value.decode())
+    return start["status"], headers, b"".join(m["body"] for m in body_messages)
+
+@pytest.fixture(scope="module")
+def asgi(app):
+    """request(method, path, ...) -> (status, headers, body), served by asgi.application."""
+    from asgi import application
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            seed_products(conn, 1)
+        bump_catalog_version()
+    # the async engines belong to the loop that first used them
+    loop = asyncio.new_event_loop()
+    yield lambda *args, **kwargs: loop.run_until_complete(_request(application, *args, **kwargs))
+    loop.run_until_complete(dispose_async_engines(app))
+    loop.close()
+
+@pytest.fixture(scope="module")
+def product_id(app, asgi):
+    with app.app_context():
+        return db.session.scalar(db.select(Product.id).order_by(Product.id.desc()))
+
+def form_post(asgi, path, **fields):
+    body = urlencode(fields).encode()
+    headers = [("content-type", "application/x-www-form-urlencoded"),
+               ("content-length", str(len(body)))]
+    return asgi("POST", path, body, headers)
+
+def test_async_product_page(asgi, product_id):
+    status, headers, body = asgi("GET", f"/product/{product_id}")
+    assert status == 200
+    assert headers["content-type"] == ["text/html; charset=utf-8"]
+    etag = headers["etag"][0]
+
+    status, _, body = asgi("GET", f"/product/{product_id}", headers=[("if-none-match", etag)])
+    assert (status, body) == (304, b"")
+
+def test_async_pipeline_blocks_off_the_event_loop(app, asgi, product_id, monkeypatch):
+    # the loop runs in this (the main) thread
+    interface = app.session_interface
+    calls = []
+
+    def recording(name, fn):
+        def wrapper(*args, **kwargs):
+            calls.append((name, threading.current_thread()))
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(interface, "open_session", recording("open", interface.open_session))
+    monkeypatch.setattr(interface, "save_session", recording("save", interface.save_session))
+    with template_rendered.connected_to(recording("render", lambda *a, **kw: None), app):
+        assert asgi("GET", f"/product/{product_id}")[0] == 200
+    assert [name for name, _ in calls] == ["open", "render", "save"]
+    assert threading.main_thread() not in [thread for _, thread in calls]
+
+def test_wsgi_fallback_post_and_async_listing(asgi):
+    status, headers, _ = form_post(asgi, "/auth/register", email="asgi@example.com", password="pw")
+    assert (status, headers["location"]) == (302, ["/auth/login"])
+
+    status, headers, _ = form_post(asgi, "/auth/login", email="asgi@example.com", password="pw")
+    assert (status, headers["location"]) == (302, ["/"])
+    cookie = headers["set-cookie"][-1].split(";")[0]
+
+    status, _, body = asgi("GET", "/", headers=[("cookie", cookie)])
+    assert status == 200
+    assert b'href="/product/' in body
+
+def test_head(asgi, product_id):
+    status, headers, body = asgi("HEAD", f"/product/{product_id}")
+    assert status == 200
+    assert int(headers["content-length"][0]) > 0
+    assert body == b""
+
+def test_async_errors(app, asgi, monkeypatch):
+    assert asgi("GET", "/product/999999999")[0] == 404
+
+    from asgi import application
+
+    async def broken(product_id):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(application.async_views, "public.product", broken)
+    monkeypatch.setitem(app.config, "PROPAGATE_EXCEPTIONS", False)
+    assert asgi("GET", "/product/1")[0] == 500
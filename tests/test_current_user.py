@@ -0,0 +1,48 @@
+import re
+
+import pytest
+import sqlalchemy as sa
+from flask import render_template_string
+from sqlalchemy.engine import Engine
+
+USER_SELECT = re.compile(r'^\s*SELECT\b.*\bFROM "?user"?(?:\s|$)', re.S | re.I)
+
+@pytest.fixture
+def user_selects():
+    """SELECTs from the user table, on any engine (primary or replica)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if USER_SELECT.search(statement):
+            statements.append(statement)
+
+    sa.event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    sa.event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+def log_in(client, email):
+    client.post("/auth/register", data={"email": email, "password": "pw"})
+    response = client.post("/auth/login", data={"email": email, "password": "pw"})
+    assert response.headers["Location"] == "/"
+
+def test_anonymous_home_does_not_load_user(client, user_selects):
+    assert client.get("/").status_code == 200
+    assert user_selects == []
+
+def test_logged_in_listing_does_not_load_user(client, user_selects):
+    log_in(client, "listing@example.com")
+    user_selects.clear()
+    assert client.get("/").status_code == 200
+    assert user_selects == []
+
+def test_reading_current_user_loads_it_once(client, user_selects):
+    log_in(client, "reader@example.com")
+    user_selects.clear()
+    with client:
+        client.get("/")
+        # still inside that request: render a template that reads
+        # current_user several times, as a page would
+        html = render_template_string(
+            "{{ current_user.email }} {{ current_user.id }} {{ current_user.email }}")
+    assert html.startswith("reader@example.com ")
+    assert len(user_selects) == 1
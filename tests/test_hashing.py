@@ -0,0 +1,27 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from services.hashing import hash_method
+
+@pytest.mark.parametrize("method, expected", [
+    ("scrypt", "scrypt:32768:8:1"),
+    ("scrypt:16384", "scrypt:16384:8:1"),
+    ("scrypt:16384:4", "scrypt:16384:4:1"),
+    ("scrypt:16384:8:2", "scrypt:16384:8:2"),
+    ("pbkdf2", "pbkdf2:sha256:1000000"),
+    ("pbkdf2:sha512", "pbkdf2:sha512:1000000"),
+    ("pbkdf2:sha256:600000", "pbkdf2:sha256:600000"),
+])
+def test_hash_method_fills_defaults_per_position(method, expected):
+    assert hash_method(method) == expected
+
+@pytest.mark.parametrize("method", ["scrypt:1024", "pbkdf2:sha512", "pbkdf2:sha256:1000"])
+def test_hash_method_matches_stored_prefix(method):
+    # needs_rehash compares stored hashes against hash_method(config)
+    stored = generate_password_hash("secret", hash_method(method))
+    assert stored.split("$", 1)[0] == hash_method(method)
+
+@pytest.mark.parametrize("method", ["md5", "scrypt:1:2:3:4", "pbkdf2:sha256:1:2"])
+def test_hash_method_rejects_unknown(method):
+    with pytest.raises(ValueError):
+        hash_method(method)
@@ -0,0 +1,35 @@
+import pytest
+
+from models import db, Product
+from services.query_plans import check_listing_plans
+from services.query_cache import bump_catalog_version
+from services.seed import seed_products
+
+@pytest.fixture(scope="module")
+def catalog(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            seed_products(conn, 20_000)
+            conn.exec_driver_sql("ANALYZE")
+        bump_catalog_version()
+    return app
+
+def test_every_listing_filter_uses_an_index(catalog):
+    with catalog.app_context():
+        failures = check_listing_plans(db.engine)
+    assert [(filters, plan) for filters, _, plan in failures] == []
+
+def test_bare_media_type_lists_every_subtype(catalog, client):
+    with catalog.app_context():
+        videos = db.session.scalars(
+            db.select(Product.id).where(Product.mime_type.like("video/%"))
+            .order_by(Product.created_at.desc(), Product.id.desc()).limit(3)
+        ).all()
+    assert videos
+    client.post("/auth/register", data={"email": "plans@example.com", "password": "pw"})
+    client.post("/auth/login", data={"email": "plans@example.com", "password": "pw"})
+
+    html = client.get("/?media_type=video").get_data(as_text=True)
+    for product_id in videos:
+        assert f'href="/product/{product_id}"' in html
+    assert 'href="/product/' not in client.get("/?media_type=vide").get_data(as_text=True)
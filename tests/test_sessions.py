@@ -0,0 +1,82 @@
+import re
+import time
+
+from flask import current_app
+
+from services.replicas import STICKY_KEY
+from services.sessions import MemoryStore, sweep
+
+def session_rows(app):
+    with app.app_context():
+        return current_app.session_interface.store.count(0)[0]
+
+def csrf_token(html):
+    return re.search(r'name="csrf-token" content="([^"]+)"', html).group(1)
+
+def test_cookieless_pages_store_no_session(app):
+    before = session_rows(app)
+    for _ in range(20):
+        response = app.test_client().get("/")
+        assert response.status_code == 200
+        assert "." in response.headers["Set-Cookie"].split(";")[0]  # signed, not an id
+    assert session_rows(app) == before
+
+def test_csrf_token_survives_in_signed_cookie(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", True)
+    # over https Flask-WTF also wants a same-origin Referer
+    client.environ_base["HTTP_REFERER"] = "https://localhost/auth/login"
+    token = csrf_token(client.get("/auth/login").get_data(as_text=True))
+    assert csrf_token(client.get("/").get_data(as_text=True)) == token
+    before = session_rows(app)
+
+    # anonymous POST with the token: checked, flashed, still not stored
+    response = client.post("/auth/register", data={"email": "", "csrf_token": token})
+    assert response.status_code == 302
+    assert session_rows(app) == before
+
+    client.post("/auth/register",
+                data={"email": "signed@example.com", "password": "pw", "csrf_token": token})
+    response = client.post("/auth/login",
+                           data={"email": "signed@example.com", "password": "pw", "csrf_token": token})
+    assert response.headers["Location"] == "/"
+    assert session_rows(app) == before + 1
+    cookie = client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    assert "." not in cookie.value  # a store id now
+
+def test_replica_deadline_stays_in_signed_cookie(app, client):
+    # replicas._wrote() sets it on an anonymous POST such as a registration
+    before = session_rows(app)
+    with client.session_transaction(base_url="https://localhost") as sess:
+        sess[STICKY_KEY] = int(time.time()) + 2
+        sess["_flashes"] = [("success", "Registration successful.")]
+    assert session_rows(app) == before
+    assert "." in client.get_cookie(app.config["SESSION_COOKIE_NAME"]).value
+    with client.session_transaction(base_url="https://localhost") as sess:
+        assert STICKY_KEY in sess
+
+def test_tampered_signed_cookie_is_dropped(app, client):
+    client.get("/")
+    name = app.config["SESSION_COOKIE_NAME"]
+    value = client.get_cookie(name).value
+    client.set_cookie(name, value[:-2] + ("AA" if not value.endswith("AA") else "BB"),
+                      secure=True)
+    with client:
+        client.get("/auth/login")
+        from flask import session
+        assert "csrf_token" in session
+    assert client.get_cookie(name).value != value
+
+def test_logout_moves_session_back_to_cookie(app, client):
+    client.post("/auth/register", data={"email": "logout@example.com", "password": "pw"})
+    client.post("/auth/login", data={"email": "logout@example.com", "password": "pw"})
+    before = session_rows(app)
+    client.get("/auth/logout")
+    assert session_rows(app) == before - 1
+
+def test_sweep_runs_until_a_short_batch():
+    store = MemoryStore(max_sessions=10_000)
+    for i in range(1234):
+        store.save(f"expired-{i}", b"j{}", expires=1, user_id=None)
+    store.save("live", b"j{}", expires=100, user_id=None)
+    assert sweep(store, now=10, batch=500) == 1234
+    assert store.count(now=10) == (1, 0)
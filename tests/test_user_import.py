@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from services.user_import import parse_record
+
+@pytest.mark.parametrize("record, error", [
+    (["a@example.com"], "not a JSON object"),
+    ({"email": 5, "password": "pw"}, "email is not a string"),
+    ({"email": "a@example.com", "password": 12345}, "password is not a string"),
+    ({"email": "a@example.com", "password_hash": ["x"]}, "password_hash is not a string"),
+    ({"email": "a@example.com"}, "no password or password_hash"),
+    ({"email": "a@example.com", "password_hash": "plain"}, "not a werkzeug hash"),
+])
+def test_invalid_records(record, error):
+    with pytest.raises(ValueError, match=error):
+        parse_record(record)
+
+def test_import_skips_invalid_records(app, tmp_path):
+    path = tmp_path / "users.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in [
+        {"email": "Import-1@Example.com", "password": "pw"},
+        {"email": 5, "password": "pw"},
+        {"email": "import-2@example.com", "password": 12345},
+        {"email": "import-3@example.com", "password": "pw", "joined_at": "2024-05-01"},
+    ]) + "\n")
+    result = app.test_cli_runner().invoke(args=["users", "import", str(path), "--workers", "0"])
+    assert result.exit_code == 0, result.output
+    assert f"{path}:2: skipped, email is not a string" in result.output
+    assert f"{path}:3: skipped, password is not a string" in result.output
+    assert "2 created" in result.output
@@ -0,0 +1,202 @@
+import asyncio
+import contextvars
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, request_started
+from werkzeug.exceptions import HTTPException
+
+# Serve a Flask app from an ASGI server. GET/HEAD requests for endpoints
+# with an async variant go through Flask's own request pipeline
+# (before/after_request hooks, sessions, error handlers) with the view
+# awaited on the event loop and the rest on the thread pool. Everything
+# else runs the regular WSGI app on the thread pool, its response streamed
+# back as it is produced.
+
+SAFE_METHODS = ("GET", "HEAD")
+MAX_BODY_IN_MEMORY = 1 << 20  # larger request bodies (uploads) spill to a temp file
+
+def wsgi_environ(scope, body):
+    """WSGI environ for an ASGI http scope; `body` is a file object."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def wsgi_messages(wsgi_app, environ):
+    """Call a WSGI app, yielding its response as ASGI messages."""
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+
+    def response_start():
+        status, headers = started
+        return {
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        }
+
+    iterable = wsgi_app(environ, start_response)
+    try:
+        head_sent = False
+        for chunk in iterable:
+            if not chunk:
+                continue
+            if not head_sent:
+                yield response_start()
+                head_sent = True
+            yield {"type": "http.response.body", "body": chunk, "more_body": True}
+        if not head_sent:
+            yield response_start()
+        yield {"type": "http.response.body", "body": b""}
+    finally:
+        if hasattr(iterable, "close"):
+            iterable.close()
+
+class FlaskASGI:
+    """
+    ASGI application for `app`. `async_views` maps endpoint names to
+    coroutine functions taking the endpoint's view args; `on_shutdown` is
+    awaited at ASGI lifespan shutdown.
+    """
+
+    def __init__(self, app, async_views, threads=8, on_shutdown=None):
+        self.app = app
+        self.async_views = async_views
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="wsgi")
+        self.on_shutdown = on_shutdown
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            environ = wsgi_environ(scope, await self._read_body(receive))
+            view = self._async_view(environ)
+            if view is None:
+                await self._run_wsgi(environ, send)
+            else:
+                await self._run_async(view, environ, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.on_shutdown is not None:
+                    await self.on_shutdown()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(max_size=MAX_BODY_IN_MEMORY)
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break  # client went away; the app sees a truncated body
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+        return body
+
+    def _async_view(self, environ):
+        if environ["REQUEST_METHOD"] not in SAFE_METHODS:
+            return None
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None  # 404, 405 and redirects: the WSGI app answers those
+        return self.async_views.get(endpoint)
+
+    async def _run_wsgi(self, environ, send):
+        loop = asyncio.get_running_loop()
+
+        def run():
+            for message in wsgi_messages(self.app, environ):
+                asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        await loop.run_in_executor(self.executor, run)
+
+    async def _run_async(self, view, environ, send):
+        # Flask.wsgi_app, with the view awaited. Only the view runs on the
+        # event loop: the session, before/after_request hooks and error
+        # handlers are blocking code (sessions.db, templates) and run on
+        # the thread pool, in this request's context.
+        app = self.app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.session = await self._in_thread(self._open_session, ctx.request)
+                ctx.push()
+                response = await self._full_dispatch(view)
+            except Exception as e:
+                error = e
+                response = await self._in_thread(_handling, app.handle_exception, e)
+            for message in wsgi_messages(response, environ):
+                await send(message)
+        finally:
+            ctx.pop(error)
+
+    async def _full_dispatch(self, view):
+        # Flask.full_dispatch_request, with the view awaited
+        app = self.app
+        try:
+            rv = await self._in_thread(self._preprocess)
+            if rv is None:
+                rv = await view(**request.view_args)
+        except Exception as e:
+            rv = await self._in_thread(_handling, app.handle_user_exception, e)
+        return await self._in_thread(app.finalize_request, rv)
+
+    async def _in_thread(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()  # the request context, if pushed
+        return await loop.run_in_executor(self.executor, context.run, fn, *args)
+
+    def _open_session(self, request):
+        # what RequestContext.push would do on the loop; reading the session
+        # here too keeps a lazily loaded one from being read on the loop
+        app = self.app
+        session = app.session_interface.open_session(app, request)
+        if session is None:
+            session = app.session_interface.make_null_session(app)
+        len(session)
+        return session
+
+    def _preprocess(self):
+        request_started.send(self.app, _async_wrapper=self.app.ensure_sync)
+        return self.app.preprocess_request()
+
+def _handling(handler, e):
+    # Flask's exception handlers run inside an except block: they log
+    # sys.exc_info() and re-raise with a bare `raise`
+    try:
+        raise e
+    except Exception:
+        return handler(e)
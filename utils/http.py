@@ -0,0 +1,33 @@
+import hashlib
+from flask import current_app, request, session
+from werkzeug.http import is_resource_modified
+
+def make_etag(*parts) -> str:
+    """
+    Validator for a rendered page. Pages vary with the visitor (navbar),
+    so the session identity is always part of it.
+    """
+    variant = (session.get("user_id"), bool(session.get("admin")))
+    return hashlib.blake2b(repr((variant, parts)).encode(), digest_size=16).hexdigest()
+
+def not_modified(etag, last_modified=None):
+    """
+    A 304 response when the client's If-None-Match / If-Modified-Since
+    still match, so the caller can skip rendering. None otherwise.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return add_validators(current_app.response_class(status=304), etag, last_modified)
+
+def add_validators(response, etag, last_modified=None):
+    # weak: the CSRF meta token differs between renders of the same content
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # per-visitor pages: browsers may keep them but must revalidate,
+    # shared caches must not store them
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
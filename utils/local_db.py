@@ -0,0 +1,41 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+class LocalSQLite:
+    """
+    A small SQLite file of host-local state kept outside the app database
+    (login throttle buckets, sessions), shared by every worker process on
+    the host. Each thread gets its own connection, re-opened after a fork;
+    `schema` runs once per connection and must be idempotent.
+    """
+
+    def __init__(self, path, schema, synchronous="NORMAL"):
+        self.path = path
+        self.schema = schema
+        self.synchronous = synchronous
+        self._local = threading.local()
+
+    def connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(self.schema)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """A write transaction; BEGIN IMMEDIATE so concurrent writers queue on busy_timeout."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
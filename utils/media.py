@@ -1,9 +1,11 @@
 import os
 from werkzeug.utils import secure_filename
 from uuid import uuid4
+from services.perf import timed_call
 
 UPLOAD_FOLDER = "static/uploads"
 
+@timed_call("storage")
 def save_media(file):
     """
     Saves an uploaded file to the static/uploads folder.
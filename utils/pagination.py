@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+def encode_cursor(values) -> str:
+    """Opaque, URL-safe token for a row's sort key."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values],
+                     separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str):
+    """Inverse of encode_cursor; returns None for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list):
+            return None
+        return [datetime.fromisoformat(v) if isinstance(v, str) else v for v in values]
+    except (ValueError, TypeError):
+        return None
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+def keyset_paginate(query, keys, per_page, after=None, before=None, descending=True,
+                    fetch=None, make_item=None):
+    """
+    Seek-method pagination: instead of OFFSET, filter on the sort key of the
+    last (or first) row seen, so every page costs the same as the first.
+
+    keys: unique sort key, e.g. (Product.created_at, Product.id), all sorted
+          in the same direction. after/before: tokens from a previous page.
+    query is an ORM Query by default; for a Core select pass fetch (runs
+    the statement, returns rows) and make_item (row -> page item).
+    """
+    after_key = decode_cursor(after) if after else None
+    before_key = decode_cursor(before) if before else None
+    if after_key is not None and len(after_key) != len(keys):
+        after_key = None
+    if before_key is not None and len(before_key) != len(keys):
+        before_key = None
+
+    row_key = tuple_(*keys)
+    backwards = before_key is not None and after_key is None
+    # walking backwards flips both the comparison and the sort order
+    forward_desc = descending != backwards
+
+    query = query.add_columns(*keys)
+    if backwards:
+        query = query.filter(row_key > tuple_(*before_key) if descending
+                             else row_key < tuple_(*before_key))
+    elif after_key is not None:
+        query = query.filter(row_key < tuple_(*after_key) if descending
+                             else row_key > tuple_(*after_key))
+
+    order = [k.desc() if forward_desc else k.asc() for k in keys]
+    query = query.order_by(None).order_by(*order).limit(per_page + 1)
+    rows = fetch(query) if fetch else query.all()
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    items = [make_item(r) if make_item else r[0] for r in rows]
+    if not rows:
+        return KeysetPage(items)
+
+    width = len(keys)
+    first_key, last_key = rows[0][-width:], rows[-1][-width:]
+    if backwards:
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = after_key is not None, more
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(last_key) if has_next else None,
+        prev_cursor=encode_cursor(first_key) if has_prev else None,
+    )